@@ -39,6 +39,8 @@ High Card/Nothing:
     Ranked by the highest ranking card, then the second highest, and so on
 '''
 
+import os
+
 def getCards():
     deck=[]
     suits=["S","C","H","D"]
@@ -48,22 +50,23 @@ def getCards():
             deck.append([card,suit])
     return deck
 
+VALID_CARDS={tuple(card) for card in getCards()}
+
+# hands are validated once in interperet, the per call @check only runs in debug mode
+STRICT=os.environ.get("POKER_STRICT") == "1"
+
 def check(fn):
     def wrapper(*a,**kwa):
-        if type(a[0]) == list:
-            checkValid(cards=a[0])
-        elif type(a[0]) == str:
-            checkValid(card=a[0])
+        if STRICT:
+            if type(a[0]) in (list,tuple):
+                checkValid(cards=a[0])
+            elif type(a[0]) == str:
+                checkValid(card=a[0])
         return fn(*a,**kwa)
     return wrapper
 
 def sortDeck(cards):
-    for i in range(len(cards)):
-        cards[i]=getCardNumericValue(cards[i])
-    cards.sort()
-    for i in range(len(cards)):
-        cards[i]=getCardProperValue(cards[i])
-    return cards
+    return tuple(tuple(getCardProperValue(c)) for c in sorted(getCardNumericValue(c) for c in cards))
 
 def getCardNumericValue(card):
     if card[0] == "A":
@@ -88,15 +91,14 @@ def getCardProperValue(card):
     return [str(card[0]),card[1]]
 
 def checkValid(card="",cards=[]):
-    validCards=getCards()
     if card == "" and cards != []:
         for c in cards:
-            if c not in validCards:
+            if tuple(c) not in VALID_CARDS:
                 raise Exception(f"Invalid card found: {c}")
         if len(cards) > 5:
             raise Exception(f"The deck of cards is too big! Expected <= 5, got {len(cards)}")
     elif card != "" and cards == []:
-        if card not in validCards:
+        if tuple(card) not in VALID_CARDS:
             raise Exception(f"Invalid card found: {card}")
     elif card == "" and cards == []:
         raise Exception("No input given to checkValid function")
@@ -116,91 +118,58 @@ def sameRank(cards):
     return True
 
 def interperet(file):
-    rows=[]
     with open(file,"r") as f:
-        
 
         for r in f:
-            x = (r.strip("\n")).split(" ")
-            rows.append(x)
-
-    for i in range(len(rows)):
-        for j in range(len(rows[i])):
-            rows[i][j]=[rows[i][j][0],rows[i][j][1],]
- 
-    for i in range(len(rows)):
-        for j in range(len(rows[i])):
-            if rows[i][j][0] == "T":
-                rows[i][j][0] = "10"
-
-
-    newrows=[]
-    for row in rows:
-        h1=row[:5]
-        h2=row[5:10]
-        newrows.append([h1,h2])
-    
-    return newrows
+            row=r.split()
+            if not row:
+                continue
+
+            row=[("10" if card[0] == "T" else card[0],card[1]) for card in row]
+
+            h1=tuple(row[:5])
+            h2=tuple(row[5:10])
+            checkValid(cards=h1)
+            checkValid(cards=h2)
+
+            yield [h1,h2]
 
 @check
 def straightFlush(cards):  
     return straight(cards) and flush(cards)
 
-@check
-def fourKind(cards):
+def suitCounts(cards):
+    # counts of the first card's suit and the first other suit, None if there are more than two suits
     card1=cards[0]
     itera=1
-    card2=cards[itera]
-    while card2[1]==card1[1]:
-        try:
-            card2=cards[itera]
-        except IndexError:
-            return False
+    while itera < len(cards) and cards[itera][1]==card1[1]:
         itera+=1
-    c=cards
-    c.remove(card1)
-    c.remove(card2)
+    if itera == len(cards):
+        return None
+    card2=cards[itera]
     card1counter=1
     card2counter=1
-    for card in cards:
+    for i,card in enumerate(cards):
+        if i == 0 or i == itera:
+            continue
         if card[1] != card1[1]:
             if card[1] != card2[1]:
-                return False
+                return None
             else:
                 card2counter+=1
         else:
             card1counter+=1
-    if 4 not in [card1counter,card2counter]:
-        return False
-    return True
+    return card1counter,card2counter
+
+@check
+def fourKind(cards):
+    counts=suitCounts(cards)
+    return counts is not None and 4 in counts
 
 @check
 def fullHouse(cards):
-    card1=cards[0]
-    itera=1
-    card2=cards[itera]
-    while card2[1]==card1[1]:
-        try:
-            card2=cards[itera]
-        except IndexError:
-            return False
-        itera+=1
-    c=cards
-    c.remove(card1)
-    c.remove(card2)
-    card1counter=1
-    card2counter=1
-    for card in cards:
-        if card[1] != card1[1]:
-            if card[1] != card2[1]:
-                return False
-            else:
-                card2counter+=1
-        else:
-            card1counter+=1
-    if 3 not in [card1counter,card2counter]:
-        return False
-    return True
+    counts=suitCounts(cards)
+    return counts is not None and 3 in counts
 
 @check
 def flush(cards):
@@ -276,7 +245,7 @@ def onePair(cards):
 def getDeckType(deck):
     itera=0
     for command in commands:
-        if command(deck.copy()) == True:
+        if command(deck) == True:
             return itera
         itera+=1
     return itera
@@ -434,24 +403,8 @@ def calcWin(h1,h2):
 
 
 
-decks=interperet("p054_poker.txt")
-
-for game in decks:
-    print(calcWin(game[0],game[1]))
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+if __name__ == "__main__":
+    decks=interperet("p054_poker.txt")
 
-    #break
+    for game in decks:
+        print(calcWin(game[0],game[1]))
@@ -39,8 +39,13 @@ High Card/Nothing:
     Ranked by the highest ranking card, then the second highest, and so on
 '''
 
+import os
 import random
 
+from pokeranalyser import lookup, metrics
+from pokeranalyser.hands import handName, packStrength
+from pokeranalyser.cards import CODES
+
 class Card():
 
     def __init__(self,suit,value):
@@ -69,11 +74,11 @@ class Card():
                 self.__suit_numeric = suit
                 self.__suit = SUITS[suit-1]
 
-        else: self.__is_value = False
+        else: self.__is_valid = False
 
         if type(value) == str: # if the given value is an "absolute" value
 
-            if value not in VALUES: self.__is_valid == False
+            if value not in VALUES: self.__is_valid = False
             else:
                 self.__value = value
                 self.__value_numeric = VALUE_MAP[value]
@@ -122,26 +127,49 @@ VALUES = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"]
 SUIT_MAP = {"S":1, "C":2, "H":3, "D":4}
 VALUE_MAP = {"A":1, "2":2, "3":3, "4":4, "5":5, "6":6, "7":7, "8":8, "9":9, "10":10, "J":11, "Q":12, "K":13}
 
-DECKS = ["royalFlush", "straightFlush", "fourKind", "fullHouse",
-         "flush", "straight", "threeKind", "twoPair", "onePair", "highCard"]
-
 for suit in SUITS: 
     for value in VALUES: 
         FULL_DECK.append(Card(suit,value))
 
 
+STRICT = os.environ.get("POKER_STRICT") == "1" # debug mode, revalidate ValidHands on every call
+
+
+@metrics.timed("validation")
+def validate(cards):
+    for card in cards:
+        if type(card) != Card or not card.valid: raise Exception(f"Invalid card: {cards}")
+    if len(cards) != 5: raise Exception(f"Expected a hand of 5 cards, got {len(cards)}")
+    if len(set(card.sort_value for card in cards)) != 5: raise Exception(f"The same card is in the hand twice: {cards}")
+
+class ValidHand(tuple):
+    '''
+    Cards that have been validated once, where the input was parsed
+
+    The @check predicates trust a ValidHand and skip validation, a plain list
+    is validated and turned into one on the way in so nested predicates don't
+    check it again
+    '''
+
+    def __new__(cls, cards):
+        cards = tuple(cards)
+        validate(cards)
+        return super().__new__(cls, cards)
+
+
 def check(fn):
     def wrapper(*a, **kwa):
 
         check = a[0]
 
-        if type(check) == Card: 
+        if type(check) == ValidHand:
+            if STRICT: validate(check)
+
+        elif type(check) == Card: 
             if not check.valid: raise Exception(f"Invalid card: {check}")
             
         elif type(check) == list:
-            if len(check) > 5: raise Exception(f"The deck of cards is too big! Expected <= 5, got {len(check)}")
-            for card in check:
-                if not card.valid: raise Exception(f"Invalid card: {check}")
+            a = (ValidHand(check),) + a[1:]
 
         else: 
             print(type(check))
@@ -255,124 +283,57 @@ def onePair(cards):
 #endregion
 
 
+# card ranks for pokeranalyser.hands.packStrength, which holds the category / kicker layout every evaluator shares
+ACE_HIGH = [0, 14, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13] # value_n -> rank with the ace above the king
+RANKS = [r - 2 for r in ACE_HIGH] # value_n -> 0 = deuce ... 12 = ace
+
+@check
+@metrics.timed("classification", handName)
+def handStrength(cards):
+    '''
+    Classifies a hand and returns a single integer, higher is better
+
+    The cards become 0 based ranks and a flush flag, and packStrength puts
+    the category above CATEGORY_SHIFT and the ranks ordered by (count, rank)
+    in 4 bit nibbles below it
+    '''
+    if len(cards) != 5: raise Exception(f"Expected a hand of 5 cards, got {len(cards)}")
+
+    a, b, c, d, e = cards
+    return packStrength([RANKS[a.value_n], RANKS[b.value_n], RANKS[c.value_n], RANKS[d.value_n], RANKS[e.value_n]],
+                        a.suit_n == b.suit_n == c.suit_n == d.suit_n == e.suit_n)
+
+
+# converters between Card objects and the compact card indexes in pokeranalyser.cards
+def toIndex(card): return (ACE_HIGH[card.value_n] - 2) * 4 + card.suit_n - 1
+
+def fromIndex(index): return Card((index & 3) + 1, (index >> 2) + 2 if index < 48 else 1)
+
+def toHand(cards): return tuple(toIndex(card) for card in cards)
+
+def fromHand(hand): return [fromIndex(index) for index in hand]
+
+def encodeCard(card): return CODES[toIndex(card)]
+
+@check
+def lookupStrength(cards): 
+    '''Equivalence class of the hand from the lookup tables, higher is better'''
+    return lookup.evaluate(*[encodeCard(card) for card in cards])
+
+BACKENDS = {"classifier": handStrength, "lookup": lookupStrength}
+
+
 class Deck():
     
     def __init__(self, a:Card, b:Card, c:Card, d:Card, e:Card):
         
         self.__deck = sorted([a,b,c,d,e])
-        self.__deck_byval:list[Card] = sorted(self.__deck, key = lambda x: x.value_n, reverse = True) # highest card first
 
-        self.__occ = occurenceList(self.__deck)
         self.__hand, self.__rel_score = self.__get_hand()
 
     def __get_hand(self):
-        deck = None; sc = 0
-
-        if flush(self.__deck):
-            if straightFlush(self.__deck):
-                if royalFlush(self.__deck): 
-                    deck = "royalFlush"
-                    sc = 1
-                else: 
-                    deck = "straightFlush"
-                    sc = self.__deck_byval[0].value_n
-            else: 
-                deck = "flush"
-                sc = self.__deck_byval[0].value_n *100000000 + self.__deck_byval[1].value_n *1000000 + self.__deck_byval[2].value_n *10000 + self.__deck_byval[3].value_n *100 + self.__deck_byval[4].value_n 
-
-        if straight(self.__deck): 
-            deck="straight"
-            sc = self.__deck_byval[0].value_n
-
-        if onePair(self.__deck):
-
-            if twoPair(self.__deck): 
-                deck = "twoPair"
-                
-                higher = 0; lower = 0; kicker = 0
-                
-                for k in self.__occ:
-                    num = VALUE_MAP[k]
-                    if self.__occ[k] == 2:
-                        if num > higher:
-                            lower = higher
-                            higher = num
-                        else:
-                            lower = num
-                    else: 
-                        kicker = num
-                
-                sc = higher * 10000 + lower * 100 + kicker
-
-            elif threeKind(self.__deck):
-
-                if fourKind(self.__deck): 
-                    deck = "fourKind"
-
-                    rep = 0; kicker = 0
-
-                    for k in self.__occ:
-                        num = VALUE_MAP[k]
-                        if self.__occ[k] == 4: rep = num
-                        else: kicker = num
-                
-                    sc = rep * 100 + kicker
-
-                else: 
-                    deck = "threeKind"
-
-                    rep = 0; kicker_h = 0; kicker_l = 0
-
-                    for k in self.__occ:
-                        num = VALUE_MAP[k]
-                        if self.__occ[k] == 3: rep = num
-                        else:
-                            if num > kicker_h:
-                                kicker_l = kicker_h
-                                kicker_h = num
-                            else:
-                                kicker_l = num
-                
-                    sc = rep * 10000 + kicker_h * 100 + kicker_l
-
-            else: 
-                deck = "onePair"
-
-                rep = 0; kicker_h = 0; kicker_m = 0; kicker_l = 0
-
-                for k in self.__occ:
-                    num = VALUE_MAP[k]
-                    if self.__occ[k] == 2: rep = num
-                    else:
-                        if num > kicker_h:
-                            kicker_l = kicker_m
-                            kicker_m = kicker_h
-                            kicker_h = num
-                        elif num > kicker_m:
-                            kicker_l = kicker_m
-                            kicker_m = num
-                        else:
-                            kicker_l = num
-            
-                sc = rep * 1000000 + kicker_h * 10000 + kicker_m * 100 + kicker_l
-
-        if fullHouse(self.__deck): 
-            deck = "fullHouse"
-
-            three = 0; two = 0
-
-            for k in self.__occ:
-                num = VALUE_MAP[k]
-                if self.__occ[k] == 3: three = num
-                if self.__occ[k] == 2: two = num
-        
-            sc = three * 100 + two
-
-        if deck == None: 
-            deck = "highCard"
-            sc = self.__deck_byval[0].value_n *100000000 + self.__deck_byval[1].value_n *1000000 + self.__deck_byval[2].value_n *10000 + self.__deck_byval[3].value_n *100 + self.__deck_byval[4].value_n 
-
-        return deck, sc
+        sc = handStrength(self.__deck)
+        return handName(sc), sc
 
     def __eq__(self,other):
         return self.__hand == other.hand
@@ -384,50 +345,46 @@ class Deck():
     def score(self): return self.__rel_score
 
 
+@metrics.timed("parse")
+def parseGame(row):
+    if len(row) != 10: raise Exception(f"Malformed game, expected 10 cards, got {len(row)}: {' '.join(row)}")
+    h1 = ValidHand(Card(card[1],card[0]) for card in row[:5])
+    h2 = ValidHand(Card(card[1],card[0]) for card in row[5:10])
+    return [h1,h2]
+
 def interperet(file):
-    rows = []
+    '''Streams the games in file one line at a time as [h1, h2] ValidHands'''
     with open(file, "r") as f:
 
         for r in f:
-            x = (r.strip("\n")).split(" ")
-            rows.append(x)
+            row = r.split()
+            if not row: continue
 
-    games = []
+            yield parseGame(row)
 
-    for row in rows:
-        h1 = []; h2 = []
 
-        for card in row[:5]: h1.append(Card(card[1],card[0]))
-        for card in row[5:10]: h2.append(Card(card[1],card[0]))
+@metrics.timed("comparison")
+def calcWin(h1,h2,backend="classifier"): # true = h1 win, false = h2 win, null = draw
+    strength = BACKENDS[backend]
 
-        games.append([h1,h2])
+    s1 = strength(h1)
+    s2 = strength(h2)
 
-    return games
-
-
-def calcWin(h1,h2): # true = h1 win, false = h2 win, null = draw
-    h1 = Deck(*h1)
-    h2 = Deck(*h2)
-
-    io1 = DECKS.index(h1.hand)
-    io2 = DECKS.index(h2.hand)
-
-    if io1 < io2: return True
-    elif io1 > io2: return False
-    else:
-        if h1.score > h1.score: return True
-        elif h1.score < h1.score: return False
+    if s1 > s2: return True
+    elif s1 < s2: return False
 
     return None
 
-decks = interperet("C:\\Users\\thoma\\Documents\\GitHub\\PokerAnalyser\\p054_poker.txt")
+if __name__ == "__main__":
+
+    decks = interperet(os.path.join(os.path.dirname(os.path.abspath(__file__)), "p054_poker.txt"))
 
-player1_wins = 0
-player2_wins = 0
-draws = 0
+    player1_wins = 0
+    player2_wins = 0
+    draws = 0
 
-for game in decks: 
-    res = calcWin(game[0], game[1])
-    if res == None: draws += 1
-    elif res: player1_wins += 1
-    elif not res: player2_wins += 1
+    for game in decks: 
+        res = calcWin(game[0], game[1])
+        if res == None: draws += 1
+        elif res: player1_wins += 1
+        elif not res: player2_wins += 1
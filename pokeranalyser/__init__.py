@@ -0,0 +1,35 @@
+'''
+Evaluation engines behind new.calcWin, usable as a library
+
+The main entry points can be imported straight from the package, e.g.
+`from pokeranalyser import evaluate_best_batch, monteCarlo`. Each module is
+only imported (and its tables only loaded) when one of its names is first
+used, so importing the package itself does no work. The command line is
+`python -m pokeranalyser`, see cli.py.
+'''
+
+EXPORTS = {
+    "parseCard": "cards", "parseHand": "cards", "handTokens": "cards",
+    "handName": "hands",
+    "evaluate_batch": "batch", "compare_batch": "batch", "evaluate_best_batch": "batch",
+    "evaluate7": "seven",
+    "HandState": "incremental",
+    "readBatches": "reader",
+    "evaluateFile": "parallel", "streamStrengths": "parallel",
+    "monteCarlo": "equity",
+    "exactEquity": "exact",
+    "parseRange": "ranges", "rangeEquity": "ranges",
+    "resolve_showdown": "showdown",
+    "findOuts": "outs",
+}
+
+
+def __getattr__(name):
+    if name not in EXPORTS: raise AttributeError(f"module 'pokeranalyser' has no attribute '{name}'")
+
+    from importlib import import_module
+    value = getattr(import_module(f".{EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__(): return sorted(list(globals()) + list(EXPORTS))
@@ -0,0 +1,104 @@
+'''
+Binary hand archive
+
+A fixed stride file of games, so game N is at HEADER_SIZE + N * record size
+and the whole file maps straight onto a NumPy structured array.
+
+Header (32 bytes, little endian):
+    4s  magic, b"PKRA"
+    H   format version
+    H   cards per game (10)
+    H   flags, bit 0 set if there is a result column
+    6x  reserved
+    Q   number of games
+    8x  reserved
+
+Record:
+    10 x uint8  card indexes (see cards.py), player 1 first
+    int8        result (+1 player 1 wins, -1 player 2 wins, 0 draw), only with the result flag
+'''
+
+import struct
+
+import numpy as np
+
+from .batch import compare_batch
+from .reader import GAME_CARDS, readBatches
+
+MAGIC = b"PKRA"
+VERSION = 1
+HEADER = struct.Struct("<4sHHH6xQ8x")
+HEADER_SIZE = HEADER.size
+
+HAS_RESULTS = 1
+
+
+def recordType(results):
+    fields = [("cards", np.uint8, (GAME_CARDS,))]
+    if results: fields.append(("result", np.int8))
+    return np.dtype(fields)
+
+
+def convert(text_path, archive_path, results=False, batch_size=65536):
+    '''Converts a text hand file into an archive, streaming, returns the number of games'''
+    dtype = recordType(results)
+    count = 0
+
+    with open(archive_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, GAME_CARDS, HAS_RESULTS if results else 0, 0))
+
+        for games in readBatches(text_path, batch_size):
+            records = np.empty(len(games), dtype = dtype)
+            records["cards"] = games
+            if results: records["result"] = compare_batch(games[:, :5], games[:, 5:])
+
+            f.write(records.tobytes())
+            count += len(games)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, GAME_CARDS, HAS_RESULTS if results else 0, count))
+
+    return count
+
+
+class Archive():
+
+    def __init__(self, path):
+
+        with open(path, "rb") as f: header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE: raise Exception(f"Not a hand archive: {path}")
+
+        magic, version, cards, flags, count = HEADER.unpack(header)
+
+        if magic != MAGIC: raise Exception(f"Not a hand archive: {path}")
+        if version != VERSION: raise Exception(f"Unsupported archive version {version}, expected {VERSION}")
+        if cards != GAME_CARDS: raise Exception(f"Unsupported archive, expected {GAME_CARDS} cards per game, got {cards}")
+
+        self.__path = path
+        self.__count = count
+        self.__has_results = bool(flags & HAS_RESULTS)
+
+        dtype = recordType(self.__has_results)
+        self.__records = np.memmap(path, dtype = dtype, mode = "r", offset = HEADER_SIZE, shape = (count,)) if count else np.empty(0, dtype = dtype)
+
+    def game(self, n):
+        '''(h1, h2) card index tuples of game n'''
+        cards = self.__records[n]["cards"].tolist()
+        return tuple(cards[:5]), tuple(cards[5:])
+
+    def __len__(self): return self.__count
+
+    def __repr__(self): return f"Archive({self.__path!r}, {self.__count} games)"
+
+
+    @property
+    def records(self): return self.__records
+
+    @property
+    def cards(self): return self.__records["cards"] # (N, 10) view, no copy
+
+    @property
+    def results(self): return self.__records["result"] if self.__has_results else None
+
+    @property
+    def has_results(self): return self.__has_results
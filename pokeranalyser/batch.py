@@ -0,0 +1,111 @@
+'''
+NumPy batch evaluation
+
+Hands are rows of card indexes (see cards.py), so a batch of N hands is an
+(N, 5) integer array. Every step works over the whole batch at once, and the
+strengths come out in the packed layout from hands.py, so they order the same
+way as new.handStrength.
+
+The 5 - 7 card tables are the cached seven.py arrays, mapped the first time
+they're needed, unless shared.py has already attached a published copy.
+'''
+
+from itertools import combinations
+
+import numpy as np
+
+from . import seven
+from .cards import PRIMES
+from .hands import CATEGORIES, CATEGORY_SHIFT, WHEEL
+
+STRAIGHTS = np.array([0b11111 << i for i in range(9)] + [WHEEL], dtype = np.int32)
+STRAIGHT_HIGHS = np.array([i + 4 for i in range(9)] + [3], dtype = np.int32)
+
+PRIME_ARRAY = np.array(PRIMES, dtype = np.int64)
+
+TABLES = {} # flush7, ranks7_keys, ranks7_values
+
+
+def useTables(flush7, ranks7_keys, ranks7_values):
+    '''Evaluates with these arrays from now on (e.g. views of shared memory)'''
+    TABLES.update(flush7 = flush7, ranks7_keys = ranks7_keys, ranks7_values = ranks7_values)
+
+def tables():
+    '''(flush7, ranks7_keys, ranks7_values) arrays, mapped from the seven.py cache on first use'''
+    if not TABLES:
+        a = seven.arrays()
+        useTables(a["flush7"], a["ranks7_keys"], a["ranks7_values"])
+
+    return TABLES["flush7"], TABLES["ranks7_keys"], TABLES["ranks7_values"]
+
+
+def evaluate_batch(cards):
+    '''Returns the packed strength (int32) of every row of an (N, 5) card array'''
+    cards = np.asarray(cards)
+    ranks = (cards >> 2).astype(np.int8)
+    suits = cards & 3
+
+    counts = (ranks[:, :, None] == ranks[:, None, :]).sum(axis = 2, dtype = np.int8) # copies of each card's rank
+    most = counts.max(axis = 1)
+
+    # cards ordered by (count, rank), the first card of each rank group adds a nibble
+    keys = np.sort(counts.astype(np.int32) * 16 + ranks, axis = 1)[:, ::-1]
+    new_group = np.ones(keys.shape, dtype = bool)
+    new_group[:, 1:] = keys[:, 1:] != keys[:, :-1]
+    groups = new_group.sum(axis = 1)
+
+    sc = np.zeros(len(cards), dtype = np.int32)
+    for j in range(5):
+        sc = np.where(new_group[:, j], (sc << 4) | ((keys[:, j] & 15) + 2), sc)
+
+    flush = (suits == suits[:, :1]).all(axis = 1)
+
+    mask = (np.int32(1) << ranks.astype(np.int32)).sum(axis = 1, dtype = np.int32)
+    is_straight = mask[:, None] == STRAIGHTS
+    straight_at = is_straight.argmax(axis = 1)
+    straight = (groups == 5) & is_straight.any(axis = 1)
+
+    category = np.select(
+        [straight & flush & (mask == STRAIGHTS[8]), straight & flush, most == 4, (most == 3) & (groups == 2),
+         flush, straight, most == 3, groups == 3, groups == 4],
+        [CATEGORIES[deck] for deck in ["royalFlush", "straightFlush", "fourKind", "fullHouse",
+                                       "flush", "straight", "threeKind", "twoPair", "onePair"]],
+        CATEGORIES["highCard"]).astype(np.int32)
+
+    sc = np.where(straight, STRAIGHT_HIGHS[straight_at] + 2, sc)
+
+    return (category << CATEGORY_SHIFT) | sc
+
+
+def compare_batch(h1, h2):
+    '''+1 where the h1 row wins, -1 where the h2 row wins and 0 for a draw'''
+    return np.sign(evaluate_batch(h1) - evaluate_batch(h2)).astype(np.int8)
+
+
+def evaluate_best_batch(cards):
+    '''
+    Best packed strength of each row of an (N, k) card array, k >= 5
+
+    Up to 7 cards this uses the seven.py tables (prime product of the ranks
+    for non flushes, the flush suit's rank mask for flushes), beyond that it
+    falls back to the best of every 5 card subset
+    '''
+    cards = np.asarray(cards)
+
+    if cards.shape[1] > 7:
+        subsets = np.array(list(combinations(range(cards.shape[1]), 5)))
+        strengths = evaluate_batch(cards[:, subsets].reshape(-1, 5))
+        return strengths.reshape(len(cards), len(subsets)).max(axis = 1)
+
+    flush7, ranks7_keys, ranks7_values = tables()
+    ranks = (cards >> 2).astype(np.int64)
+    suits = cards & 3
+
+    products = PRIME_ARRAY[ranks].prod(axis = 1)
+    strengths = ranks7_values[np.searchsorted(ranks7_keys, products)]
+
+    bits = np.int64(1) << ranks
+    for suit in range(4):
+        strengths = np.maximum(strengths, flush7[np.where(suits == suit, bits, 0).sum(axis = 1)])
+
+    return strengths
@@ -0,0 +1,243 @@
+'''
+Benchmark suite for the evaluators
+
+Every backend scores the same games for each workload, and the results
+record hands / second, per game latency percentiles and peak traced memory.
+Results are saved as JSON, and compare() flags any backend / workload whose
+throughput dropped more than a threshold below a saved baseline.
+
+Workloads:
+    p054     the bundled p054_poker.txt
+    uniform  games dealt uniformly at random
+    pairs    games where most hands are dealt a pair first
+
+Backends:
+    main, new, new-lookup      calcWin from the two scripts (imported lazily)
+    lookup, seven, batch       the pokeranalyser engines
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from . import lookup
+from .batch import compare_batch
+from .cards import RANKS, SUITS, parseHand
+from .seven import evaluate7
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+P054 = os.path.join(ROOT, "p054_poker.txt")
+
+BATCH_SIZE = 1000 # games per call for the batch backend, latency is per game within a call
+
+
+# WORKLOADS
+#region
+
+def p054Workload(games, rng):
+    with open(P054, "r") as f:
+        rows = [parseHand(r.split()) for r in f if r.strip()]
+
+    return [(row[:5], row[5:]) for row in (rows * (games // len(rows) + 1))[:games]]
+
+def uniformWorkload(games, rng):
+    out = []
+    for _ in range(games):
+        cards = rng.sample(range(52), 10)
+        out.append((tuple(cards[:5]), tuple(cards[5:])))
+    return out
+
+def pairsWorkload(games, rng, bias=0.7):
+    out = []
+    for _ in range(games):
+        used = set(); hands = []
+
+        for _ in range(2):
+            hand = []
+            if rng.random() < bias:
+                rank = rng.randrange(13)
+                free = [rank * 4 + s for s in range(4) if rank * 4 + s not in used]
+                if len(free) >= 2: hand = rng.sample(free, 2)
+                used.update(hand)
+
+            while len(hand) < 5:
+                card = rng.randrange(52)
+                if card not in used:
+                    used.add(card); hand.append(card)
+
+            hands.append(tuple(hand))
+
+        out.append(tuple(hands))
+    return out
+
+WORKLOADS = {"p054": p054Workload, "uniform": uniformWorkload, "pairs": pairsWorkload}
+
+#endregion
+
+
+# BACKENDS
+# each is prepare(games) -> (run(game), converted games), conversion isn't timed
+#region
+
+def mainBackend(games):
+    sys.path.insert(0, ROOT)
+    import main
+
+    def card(i): return ("10" if RANKS[i >> 2] == "T" else RANKS[i >> 2], SUITS[i & 3])
+
+    def run(game):
+        with contextlib.redirect_stdout(io.StringIO()): return main.calcWin(*game)
+
+    return run, [(tuple(card(i) for i in h1), tuple(card(i) for i in h2)) for h1, h2 in games]
+
+def newBackend(games, backend="classifier"):
+    sys.path.insert(0, ROOT)
+    import new
+
+    def run(game): return new.calcWin(game[0], game[1], backend)
+
+    return run, [(new.ValidHand(new.fromHand(h1)), new.ValidHand(new.fromHand(h2))) for h1, h2 in games]
+
+def lookupBackend(games):
+    evaluate = lookup.evaluateHand
+
+    def run(game):
+        r1 = evaluate(game[0]); r2 = evaluate(game[1])
+        return True if r1 > r2 else False if r1 < r2 else None
+
+    return run, games
+
+def sevenBackend(games):
+    def run(game):
+        s1 = evaluate7(game[0]); s2 = evaluate7(game[1])
+        return True if s1 > s2 else False if s1 < s2 else None
+
+    return run, games
+
+def batchBackend(games):
+    arrays = []
+    for i in range(0, len(games), BATCH_SIZE):
+        chunk = np.array([h1 + h2 for h1, h2 in games[i:i + BATCH_SIZE]], dtype = np.uint8)
+        arrays.append((chunk[:, :5], chunk[:, 5:]))
+
+    def run(chunk): return compare_batch(*chunk)
+
+    return run, arrays
+
+BACKENDS = {"main": mainBackend, "new": newBackend, "new-lookup": lambda games: newBackend(games, "lookup"),
+            "lookup": lookupBackend, "seven": sevenBackend, "batch": batchBackend}
+
+#endregion
+
+
+def percentile(sorted_values, p): return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+def measure(backend, games):
+    '''Times one backend over games, then reruns it under tracemalloc for the peak memory'''
+    run, items = BACKENDS[backend](games)
+    per_call = len(games) / len(items)
+
+    latencies = []; errors = 0
+    clock = time.perf_counter_ns
+
+    try: run(items[0]) # untimed, loads any lazily built tables (see tables.py)
+    except (Exception, SystemExit): pass
+
+    start = clock()
+    for item in items:
+        t = clock()
+        try: run(item)
+        except (Exception, SystemExit): errors += 1 # main.calcWin bails out with SystemExit on some hands
+        latencies.append((clock() - t) / per_call)
+    total = (clock() - start) / 1e9
+
+    tracemalloc.start()
+    for item in items:
+        try: run(item)
+        except (Exception, SystemExit): pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {"games": len(games), "seconds": total, "hands_per_sec": 2 * len(games) / total,
+            "p50_us": percentile(latencies, 50) / 1000, "p90_us": percentile(latencies, 90) / 1000,
+            "p99_us": percentile(latencies, 99) / 1000, "peak_kib": peak / 1024, "errors": errors}
+
+
+def run(backends=None, workloads=None, games=20000, seed=0):
+    '''Runs every backend on every workload, returns a JSON-able dict'''
+    backends = backends or list(BACKENDS)
+    workloads = workloads or list(WORKLOADS)
+
+    results = {}
+    for workload in workloads:
+        dealt = WORKLOADS[workload](games, random.Random(seed))
+        for backend in backends: results[f"{backend}/{workload}"] = measure(backend, dealt)
+
+    return {"meta": {"python": platform.python_version(), "platform": platform.platform(), "games": games, "seed": seed,
+                     "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "results": results}
+
+
+def save(results, path):
+    with open(path, "w") as f: json.dump(results, f, indent = 2)
+
+def load(path):
+    with open(path, "r") as f: return json.load(f)
+
+def compare(current, baseline, threshold=0.1):
+    '''[(key, baseline hands/s, current hands/s, change)] for every key that slowed down by more than threshold'''
+    regressions = []
+
+    for key, result in current["results"].items():
+        if key not in baseline["results"]: continue
+
+        before = baseline["results"][key]["hands_per_sec"]
+        after = result["hands_per_sec"]
+        change = after / before - 1
+
+        if change < -threshold: regressions.append((key, before, after, change))
+
+    return regressions
+
+
+def report(results):
+    lines = [f"{'backend/workload':<24}{'hands/s':>14}{'p50 us':>10}{'p99 us':>10}{'peak KiB':>12}{'errors':>8}"]
+    for key, r in results["results"].items():
+        lines.append(f"{key:<24}{r['hands_per_sec']:>14,.0f}{r['p50_us']:>10.2f}{r['p99_us']:>10.2f}{r['peak_kib']:>12,.0f}{r['errors']:>8}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog = "python -m pokeranalyser.bench", description = "Benchmark the evaluators")
+    parser.add_argument("--backends", nargs = "+", choices = list(BACKENDS))
+    parser.add_argument("--workloads", nargs = "+", choices = list(WORKLOADS))
+    parser.add_argument("--games", type = int, default = 20000)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--out", help = "save the results as JSON")
+    parser.add_argument("--baseline", help = "JSON results to compare against")
+    parser.add_argument("--threshold", type = float, default = 0.1, help = "allowed slowdown, 0.1 = 10%%")
+    args = parser.parse_args(argv)
+
+    results = run(args.backends, args.workloads, args.games, args.seed)
+    print(report(results))
+    if args.out: save(results, args.out)
+
+    if args.baseline:
+        regressions = compare(results, load(args.baseline), args.threshold)
+        for key, before, after, change in regressions:
+            print(f"REGRESSION {key}: {before:,.0f} -> {after:,.0f} hands/s ({change:+.1%})")
+        if regressions: return 1
+
+    return 0
+
+if __name__ == "__main__": sys.exit(main())
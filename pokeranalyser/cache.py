@@ -0,0 +1,63 @@
+'''
+Bounded LRU cache with hit / miss / eviction counters
+
+Safe to share between threads, lookups and updates happen under a lock
+'''
+
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache():
+
+    def __init__(self, maxsize=65536):
+
+        if maxsize < 1: raise Exception(f"Cache size must be at least 1, got {maxsize}")
+
+        self.__maxsize = maxsize
+        self.__data = OrderedDict()
+        self.__lock = Lock()
+
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def get(self, key, compute):
+        '''Cached value for key, calling compute() and storing the result on a miss'''
+        data = self.__data
+
+        with self.__lock:
+            if key in data:
+                self.__hits += 1
+                data.move_to_end(key)
+                return data[key]
+
+            self.__misses += 1
+
+        value = compute()
+
+        with self.__lock:
+            data[key] = value
+
+            if len(data) > self.__maxsize:
+                data.popitem(last = False)
+                self.__evictions += 1
+
+        return value
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+            self.__hits = self.__misses = self.__evictions = 0
+
+    def __len__(self): return len(self.__data)
+
+
+    @property
+    def maxsize(self): return self.__maxsize
+
+    @property
+    def stats(self):
+        lookups = self.__hits + self.__misses
+        return {"size": len(self.__data), "maxsize": self.__maxsize, "hits": self.__hits, "misses": self.__misses,
+                "evictions": self.__evictions, "hit_rate": self.__hits / lookups if lookups else 0.0}
@@ -0,0 +1,57 @@
+'''
+Suit isomorphism
+
+Two hands are suit isomorphic when one becomes the other by renaming suits,
+which is the case exactly when they have the same multiset of per suit rank
+masks. canonicalHand renames the suits so the masks come out in descending
+order, giving one representative per isomorphism class.
+
+For evaluation even less matters: only the ranks and, when there is one, the
+rank mask of the flush suit. evaluationKey gives that, so every non flush
+5 card hand collapses to its rank multiset.
+'''
+
+from .cards import RANKS
+
+STARTING_HANDS = [] # the 169 Hold'em starting hand classes, "AA", "AKs", "AKo" ...
+
+for high in range(12, -1, -1):
+    for low in range(high, -1, -1):
+        if high == low: STARTING_HANDS.append(RANKS[high] * 2)
+        else:
+            STARTING_HANDS.append(RANKS[high] + RANKS[low] + "s")
+            STARTING_HANDS.append(RANKS[high] + RANKS[low] + "o")
+
+STARTING_INDEX = {name: i for i, name in enumerate(STARTING_HANDS)}
+
+
+def suitMasks(hand):
+    masks = [0, 0, 0, 0]
+    for i in hand: masks[i & 3] |= 1 << (i >> 2)
+    return masks
+
+def canonicalHand(hand):
+    '''Suit isomorphic representative of hand, as a tuple of card indexes in descending order'''
+    masks = suitMasks(hand)
+    order = sorted(range(4), key = lambda s: masks[s], reverse = True)
+    rename = {suit: new for new, suit in enumerate(order)}
+
+    return tuple(sorted(((i >> 2) * 4 + rename[i & 3] for i in hand), reverse = True))
+
+def evaluationKey(hand):
+    '''(ranks in descending order, rank mask of the flush suit or 0), enough to evaluate 5 - 7 cards'''
+    flush = 0
+    for mask in suitMasks(hand):
+        if bin(mask).count("1") >= 5: flush = mask
+
+    return tuple(sorted((i >> 2 for i in hand), reverse = True)), flush
+
+
+def startingHand(hole):
+    '''Name of the starting hand class of two hole cards, e.g. "AKs"'''
+    a, b = sorted(hole, reverse = True)
+
+    if a >> 2 == b >> 2: return RANKS[a >> 2] * 2
+    return RANKS[a >> 2] + RANKS[b >> 2] + ("s" if a & 3 == b & 3 else "o")
+
+def startingIndex(hole): return STARTING_INDEX[startingHand(hole)]
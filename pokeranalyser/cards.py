@@ -0,0 +1,66 @@
+'''
+Compact card encodings
+
+A card index is a small int, rank * 4 + suit (0 = 2S ... 51 = AD), which fits
+in a byte. Hands are tuples of indexes, and many hands are stored flat in an
+array('B'), five bytes per hand.
+
+For evaluation each index maps to a 32 bit code laid out as
+
+    xxxbbbbb bbbbbbbb cdhsrrrr xxpppppp
+
+b = one bit set for the rank (deuce = bit 16 ... ace = bit 28)
+cdhs = one bit set for the suit
+r = rank index (deuce = 0 ... ace = 12)
+p = prime for the rank (deuce = 2 ... ace = 41)
+'''
+
+from array import array
+
+RANKS = "23456789TJQKA"
+SUITS = "SCHD" # same order as new.SUITS
+
+PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+
+HAND_SIZE = 5
+
+
+def makeCard(rank, suit):
+    '''rank is 0 (deuce) to 12 (ace), suit is 0 to 3 in SUITS order'''
+    return (1 << (16 + rank)) | (1 << (12 + suit)) | (rank << 8) | PRIMES[rank]
+
+def cardRank(card): return (card >> 8) & 0xF
+
+def cardSuit(card): return ((card >> 12) & 0xF).bit_length() - 1
+
+
+def cardIndex(rank, suit): return rank * 4 + suit
+
+CODES = [makeCard(i >> 2, i & 3) for i in range(52)] # index -> 32 bit code
+TOKENS = [RANKS[i >> 2] + SUITS[i & 3] for i in range(52)] # index -> "TS" style token
+
+INDEXES = {token: i for i, token in enumerate(TOKENS)}
+for i, token in enumerate(TOKENS): # main.py style "10S"
+    if token[0] == "T": INDEXES["10" + token[1]] = i
+
+
+def parseCard(token):
+    try: return INDEXES[token]
+    except KeyError: raise Exception(f"Invalid card: {token}")
+
+def parseHand(tokens): return tuple(parseCard(token) for token in tokens)
+
+def handTokens(hand): return " ".join(TOKENS[i] for i in hand)
+
+def handCodes(hand): return tuple(CODES[i] for i in hand)
+
+
+def packHands(hands):
+    '''Flattens an iterable of 5 card hands into an array('B'), five bytes per hand'''
+    packed = array("B")
+    for hand in hands: packed.extend(hand)
+    return packed
+
+def unpackHand(packed, n): return tuple(packed[n * HAND_SIZE:(n + 1) * HAND_SIZE])
+
+def handCount(packed): return len(packed) // HAND_SIZE
@@ -0,0 +1,144 @@
+'''
+Command line entry point, python -m pokeranalyser MODE ...
+
+    evaluate FILE    score every game of a hand file (p054_poker.txt format)
+    equity HOLE      Monte Carlo equity of two hole cards, e.g. "AS KS"
+    enumerate        count every 5 or 7 card hand by category
+    bench            the benchmark suite (see bench.py for its options)
+
+Per game results go through the output.py writers a chunk at a time rather
+than a print per game, and nothing heavier than argparse is imported until
+a mode runs.
+'''
+
+import argparse
+import json
+import sys
+import time
+
+BACKENDS = ("batch", "lookup")
+SUMMARIES = ("text", "json")
+STREAMS = ("lines", "csv", "jsonl") # per game, to --out or stdout
+FILES = ("int8", "columnar") # per game, --out only
+
+
+def writeValues(out, values, fmt):
+    '''A flat dict as one JSON line or as aligned "name  value" text'''
+    if fmt == "json": out.write(json.dumps(values) + "\n"); return
+
+    for k, v in values.items():
+        if isinstance(v, float): out.write(f"{k:<16}{v:>14.4f}\n")
+        else: out.write(f"{k:<16}{v:>14,}\n")
+
+def writeMetrics(path):
+    from . import metrics
+
+    if path == "-": sys.stderr.write(metrics.toJson() + "\n"); return
+    with open(path, "w") as f: f.write(metrics.toPrometheus() if path.endswith(".prom") else metrics.toJson())
+
+
+def evaluateMode(args, out):
+    from .output import RESULTS, WRITERS, aggregate
+    from .parallel import streamStrengths
+
+    streaming = args.format in WRITERS
+    writers = [WRITERS[args.format](args.out or out)] if streaming else []
+
+    start = time.perf_counter()
+    tally = aggregate(streamStrengths(args.file, args.workers, batch_size = args.batch_size, backend = args.backend), writers)
+    seconds = time.perf_counter() - start
+
+    if streaming and not args.out: return 0 # the results went to stdout
+
+    if args.format == "json": out.write(json.dumps(dict(tally, seconds = seconds)) + "\n"); return 0
+
+    writeValues(out, {k: tally[k] for k in ("player1_wins", "player2_wins", "draws")}, "text")
+    out.write(f"\n{'':<16}{'hands':>14}" + "".join(f"{r:>10}" for r in RESULTS) + "\n")
+    for deck, n in tally["categories"].items():
+        out.write(f"{deck:<16}{n:>14,}" + "".join(f"{tally['outcomes'][deck][r]:>10,}" for r in RESULTS) + "\n")
+    out.write(f"\n{tally['games']:,} games in {seconds:.2f}s ({tally['games'] / max(seconds, 1e-9):,.0f} games/s)\n")
+    return 0
+
+def equityMode(args, out):
+    from .cards import parseHand
+    from .equity import monteCarlo
+
+    hole = parseHand(args.hole.split())
+    board = parseHand(args.board.split()) if args.board else ()
+
+    result = monteCarlo(hole, board, args.opponents, args.samples, args.precision, args.seed, args.workers or 1, args.batch_size)
+    writeValues(out, result, args.format)
+    return 0
+
+def enumerateMode(args, out):
+    from .frequency import frequencies, verify
+
+    table = frequencies(args.cards, args.workers)
+    writeValues(out, dict(table["categories"], total = table["hands"]), args.format)
+
+    mismatches = verify(table)
+    for deck, expected, got in mismatches: print(f"MISMATCH {deck}: expected {expected:,}, got {got:,}", file = sys.stderr)
+    return 1 if mismatches else 0
+
+def parser():
+    p = argparse.ArgumentParser(prog = "python -m pokeranalyser", description = "Poker hand evaluation")
+    modes = p.add_subparsers(dest = "mode", required = True)
+
+    def common(mode, formats, default):
+        mode.add_argument("--workers", type = int, help = "worker processes")
+        mode.add_argument("--batch-size", type = int, default = 65536, help = "games / deals per batch")
+        mode.add_argument("--format", choices = formats, default = default)
+        mode.add_argument("--metrics", help = "write instrumentation to this file when done, Prometheus text for *.prom, "
+                                              "JSON otherwise, - for stderr")
+
+    evaluate = modes.add_parser("evaluate", help = "score every game of a hand file")
+    evaluate.add_argument("file")
+    evaluate.add_argument("--backend", choices = BACKENDS, default = "batch")
+    evaluate.add_argument("--out", help = "file for the per game results, the summary then goes to stdout")
+    common(evaluate, SUMMARIES + STREAMS + FILES, "text")
+    evaluate.set_defaults(run = evaluateMode)
+
+    equity = modes.add_parser("equity", help = "Monte Carlo equity of two hole cards")
+    equity.add_argument("hole", help = 'e.g. "AS KS"')
+    equity.add_argument("--board", help = 'e.g. "7S 2S 9D"')
+    equity.add_argument("--opponents", type = int, default = 1)
+    equity.add_argument("--samples", type = int, default = 100000)
+    equity.add_argument("--precision", type = float, help = "stop early at this confidence interval, 0.01 = 1%%")
+    equity.add_argument("--seed", type = int, default = 0)
+    common(equity, SUMMARIES, "text")
+    equity.set_defaults(run = equityMode, batch_size = 5000)
+
+    enumerate_ = modes.add_parser("enumerate", help = "count every 5 or 7 card hand by category")
+    enumerate_.add_argument("--cards", type = int, choices = (5, 7), default = 5)
+    common(enumerate_, SUMMARIES, "text")
+    enumerate_.set_defaults(run = enumerateMode)
+
+    modes.add_parser("bench", help = "benchmark the evaluators, options are passed on to pokeranalyser.bench", add_help = False)
+
+    return p
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    if argv[:1] == ["bench"]:
+        from . import bench
+        return bench.main(argv[1:])
+
+    p = parser()
+    args = p.parse_args(argv)
+    if args.mode == "evaluate" and args.format in FILES and not args.out: p.error(f"--format {args.format} needs --out")
+
+    if args.metrics:
+        from . import metrics
+        metrics.enable() # before the mode imports its engine, so its stages get timed
+
+    out = sys.stdout
+    try:
+        code = args.run(args, out)
+        out.flush()
+        if args.metrics: writeMetrics(args.metrics)
+        return code
+    except BrokenPipeError: # e.g. piped into head
+        sys.stderr.close()
+        return 1
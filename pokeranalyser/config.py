@@ -0,0 +1,8 @@
+'''
+Shared settings, read from the environment
+'''
+
+import os
+
+# where precomputed tables and matrices are cached
+CACHE_DIR = os.environ.get("POKER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "pokeranalyser")
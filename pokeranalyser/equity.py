@@ -0,0 +1,95 @@
+'''
+Monte Carlo equity for Texas Hold'em
+
+Given the hero's two hole cards, an optional partial board and a number of
+opponents, random completions are dealt from the rest of the deck and every
+player's best 5 of 7 is compared.
+
+Sampling runs in tasks of batch_size deals. Task i always draws from
+SeedSequence(seed, spawn_key = (i,)), and tasks are run in waves of
+`workers`, so a given seed and worker count always gives the same result,
+early stopping included.
+'''
+
+from contextlib import nullcontext
+
+import numpy as np
+
+from .batch import evaluate_best_batch
+from .shared import sharedPool
+
+BOARD_SIZE = 5
+
+
+def remainingDeck(*dead):
+    '''Card indexes not in any of the given hands'''
+    used = set()
+    for hand in dead: used.update(hand)
+    return np.array([i for i in range(52) if i not in used], dtype = np.int8)
+
+
+def sampleTask(hole, board, opponents, samples, seed, task):
+    '''[wins, ties, losses, equity share] for one task of random deals'''
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key = (task,)))
+    deck = remainingDeck(hole, board)
+
+    missing = BOARD_SIZE - len(board)
+    dealt = deck[rng.random((samples, len(deck))).argsort(axis = 1)[:, :missing + 2 * opponents]]
+
+    boards = np.concatenate((np.broadcast_to(np.array(board, dtype = np.int8), (samples, len(board))), dealt[:, :missing]), axis = 1)
+
+    hero = evaluate_best_batch(np.concatenate((np.broadcast_to(np.array(hole, dtype = np.int8), (samples, 2)), boards), axis = 1))
+    villains = np.stack([evaluate_best_batch(np.concatenate((dealt[:, missing + 2 * i:missing + 2 * i + 2], boards), axis = 1))
+                         for i in range(opponents)], axis = 1)
+
+    best = villains.max(axis = 1)
+    win = hero > best
+    tie = hero == best
+    share = np.where(win, 1.0, np.where(tie, 1.0 / (1 + (villains == hero[:, None]).sum(axis = 1)), 0.0))
+
+    return np.array([win.sum(), tie.sum(), samples - win.sum() - tie.sum(), share.sum()], dtype = float)
+
+
+def margin(totals, z):
+    '''Largest confidence interval half width of the win / tie / loss rates'''
+    n = totals[:3].sum()
+    p = totals[:3] / n
+    return float(z * np.sqrt(p * (1 - p) / n).max())
+
+def monteCarlo(hole, board=(), opponents=1, samples=100000, precision=None, seed=0, workers=1, batch_size=5000, z=1.96):
+    '''
+    Win / tie / loss percentages for hole (2 card indexes) against `opponents`
+    random hands on board (0 - 5 card indexes)
+
+    Stops after `samples` deals, or earlier once the z confidence interval of
+    every rate is within +- precision (a fraction, 0.01 = 1%)
+    '''
+    if len(hole) != 2: raise Exception(f"Expected 2 hole cards, got {len(hole)}")
+    if len(board) > BOARD_SIZE: raise Exception(f"The board is too big! Expected <= 5, got {len(board)}")
+    if len(set(hole) | set(board)) != len(hole) + len(board): raise Exception("Duplicate cards in hole / board")
+    if opponents < 1: raise Exception(f"Expected at least 1 opponent, got {opponents}")
+    if BOARD_SIZE - len(board) + 2 * opponents > 52 - len(hole) - len(board):
+        raise Exception(f"Not enough cards left to deal {opponents} opponents and the board")
+
+    hole = tuple(hole); board = tuple(board)
+    totals = np.zeros(4)
+    task = 0
+
+    with sharedPool(workers) if workers > 1 else nullcontext() as pool:
+        while totals[:3].sum() < samples:
+            wave = []
+            for _ in range(workers):
+                size = int(min(batch_size, samples - totals[:3].sum() - batch_size * len(wave)))
+                if size <= 0: break
+
+                args = (hole, board, opponents, size, seed, task)
+                wave.append(pool.submit(sampleTask, *args) if pool else sampleTask(*args))
+                task += 1
+
+            for result in wave: totals += result.result() if pool else result
+
+            if precision is not None and margin(totals, z) <= precision: break
+
+    n = totals[:3].sum()
+    return {"win": float(100 * totals[0] / n), "tie": float(100 * totals[1] / n), "loss": float(100 * totals[2] / n),
+            "equity": float(100 * totals[3] / n), "samples": int(n), "margin": 100 * margin(totals, z)}
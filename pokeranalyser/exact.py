@@ -0,0 +1,78 @@
+'''
+Exact equity by enumerating every board completion
+
+Known and dead cards are tracked in a 52 bit deck mask (bit i = card index
+i). The remaining cards are read off the mask once, and the runouts are
+generated in chunks as index arrays into them, so no per combination lists
+or card objects are built.
+'''
+
+from itertools import chain, combinations, islice
+from math import comb
+
+import numpy as np
+
+from .batch import evaluate_best_batch
+
+BOARD_SIZE = 5
+FULL_MASK = (1 << 52) - 1
+CHUNK_SIZE = 50000 # runouts evaluated per batch
+
+
+def cardMask(*hands):
+    mask = 0
+    for hand in hands:
+        for card in hand:
+            if mask >> card & 1: raise Exception(f"Card {card} is used twice")
+            mask |= 1 << card
+    return mask
+
+def maskCards(mask): return [i for i in range(52) if mask >> i & 1]
+
+
+def runoutChunks(n, k, chunk_size=CHUNK_SIZE):
+    '''(m, k) int8 arrays of every k combination of range(n), chunk_size rows at a time'''
+    combos = combinations(range(n), k)
+    left = comb(n, k)
+
+    while left:
+        rows = min(chunk_size, left)
+        chunk = np.fromiter(chain.from_iterable(islice(combos, rows)), dtype = np.int8, count = rows * k)
+        yield chunk.reshape(rows, k)
+        left -= rows
+
+
+def exactEquity(hands, board=(), dead=()):
+    '''
+    Enumerates every completion of board for the players' hole cards
+
+    Returns the number of runouts and each player's win count, tie count and
+    equity (%), where a tie splits the pot between everyone tied for best
+    '''
+    if len(hands) < 2: raise Exception("Need at least 2 hands")
+    if len(board) > BOARD_SIZE: raise Exception(f"The board is too big! Expected <= 5, got {len(board)}")
+
+    remaining = np.array(maskCards(FULL_MASK & ~cardMask(board, dead, *hands)), dtype = np.int8)
+    missing = BOARD_SIZE - len(board)
+
+    wins = np.zeros(len(hands), dtype = np.int64)
+    ties = np.zeros(len(hands), dtype = np.int64)
+    shares = np.zeros(len(hands))
+
+    for chunk in runoutChunks(len(remaining), missing):
+        n = len(chunk)
+        boards = np.concatenate((np.broadcast_to(np.array(board, dtype = np.int8), (n, len(board))), remaining[chunk]), axis = 1)
+
+        strengths = np.stack([evaluate_best_batch(np.concatenate((np.broadcast_to(np.array(hand, dtype = np.int8), (n, len(hand))), boards), axis = 1))
+                              for hand in hands], axis = 1)
+
+        best = strengths == strengths.max(axis = 1)[:, None]
+        tied = best.sum(axis = 1)
+
+        wins += (best & (tied == 1)[:, None]).sum(axis = 0)
+        ties += (best & (tied > 1)[:, None]).sum(axis = 0)
+        shares += (best / tied[:, None]).sum(axis = 0)
+
+    runouts = comb(len(remaining), missing)
+    return {"runouts": runouts,
+            "players": [{"win": int(w), "tie": int(t), "equity": float(100 * s / runouts)} for w, t, s in zip(wins, ties, shares)]}
@@ -0,0 +1,105 @@
+'''
+Full deck enumeration and frequency tables
+
+Enumerates all 2,598,960 five card hands, or all 133,784,560 seven card
+hands, and counts how many fall into each category in DECKS and each of
+the 7462 equivalence classes in lookup.py (for 7 cards the class of the
+best 5). The work is split by the lowest card (5 cards) or the two lowest
+cards (7 cards) and spread over a process pool.
+
+EXPECTED holds the textbook category counts, so verify() doubles as a
+correctness check after an engine change.
+'''
+
+import argparse
+import json
+import os
+import sys
+import time
+from itertools import combinations
+
+import numpy as np
+
+from . import lookup
+from .batch import evaluate_best_batch
+from .hands import DECKS
+from .shared import sharedPool
+
+EXPECTED = {
+    5: {"royalFlush": 4, "straightFlush": 36, "fourKind": 624, "fullHouse": 3744, "flush": 5108,
+        "straight": 10200, "threeKind": 54912, "twoPair": 123552, "onePair": 1098240, "highCard": 1302540},
+    7: {"royalFlush": 4324, "straightFlush": 37260, "fourKind": 224848, "fullHouse": 3473184, "flush": 4047644,
+        "straight": 6180020, "threeKind": 6461620, "twoPair": 31433400, "onePair": 58627800, "highCard": 23294460},
+}
+
+COMBOS = {} # (n, k) -> every k combination of range(n), cached per process
+
+
+def combos(n, k):
+    if (n, k) not in COMBOS: COMBOS[n, k] = np.array(list(combinations(range(n), k)), dtype = np.int8).reshape(-1, k)
+    return COMBOS[n, k]
+
+def prefixes(cards):
+    '''The fixed lowest cards of each task, every prefix leaves at least enough cards to finish a hand'''
+    fixed = 1 if cards == 5 else 2
+    return list(combinations(range(52 - (cards - fixed)), fixed))
+
+def countPrefix(cards, prefix):
+    '''Hands per class (index 1 - 7462) for every hand whose lowest cards are prefix'''
+    rest = cards - len(prefix)
+    tail = prefix[-1] + 1 + combos(51 - prefix[-1], rest)
+
+    hands = np.concatenate((np.broadcast_to(np.array(prefix, dtype = np.int8), (len(tail), len(prefix))), tail), axis = 1)
+    strengths = evaluate_best_batch(hands)
+
+    return np.bincount(np.searchsorted(lookup.arrays()["class_strengths"], strengths), minlength = lookup.HAND_CLASSES + 1)
+
+
+def frequencies(cards=5, workers=None):
+    '''{"cards", "hands", "categories": {deck: count}, "classes": [count per class, index 0 unused]}'''
+    if cards not in EXPECTED: raise Exception(f"Expected 5 or 7 cards, got {cards}")
+
+    tasks = prefixes(cards)
+    workers = workers or os.cpu_count() or 1
+    counts = np.zeros(lookup.HAND_CLASSES + 1, dtype = np.int64)
+
+    if workers == 1:
+        for prefix in tasks: counts += countPrefix(cards, prefix)
+    else:
+        with sharedPool(workers) as pool:
+            for result in pool.map(countPrefix, [cards] * len(tasks), tasks, chunksize = max(1, len(tasks) // (workers * 8))):
+                counts += result
+
+    categories = {deck: 0 for deck in DECKS}
+    for rank in range(1, lookup.HAND_CLASSES + 1): categories[lookup.handName(rank)] += int(counts[rank])
+
+    return {"cards": cards, "hands": int(counts.sum()), "categories": categories, "classes": counts.tolist()}
+
+def verify(table):
+    '''[(deck, expected, got)] for every category that doesn't match EXPECTED'''
+    expected = EXPECTED[table["cards"]]
+    return [(deck, expected[deck], table["categories"][deck]) for deck in DECKS if expected[deck] != table["categories"][deck]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog = "python -m pokeranalyser.frequency", description = "Enumerate every hand and count categories / classes")
+    parser.add_argument("--cards", type = int, choices = [5, 7], default = 5)
+    parser.add_argument("--workers", type = int)
+    parser.add_argument("--out", help = "save the table as JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    table = frequencies(args.cards, args.workers)
+    seconds = time.perf_counter() - start
+
+    for deck in DECKS: print(f"{deck:<16}{table['categories'][deck]:>14,}")
+    print(f"{'total':<16}{table['hands']:>14,}  ({seconds:.1f}s, {table['hands'] / seconds:,.0f} hands/s)")
+
+    if args.out:
+        with open(args.out, "w") as f: json.dump(table, f)
+
+    mismatches = verify(table)
+    for deck, expected, got in mismatches: print(f"MISMATCH {deck}: expected {expected:,}, got {got:,}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__": sys.exit(main())
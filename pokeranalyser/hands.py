@@ -0,0 +1,115 @@
+'''
+Hand categories and the packed strength layout shared by the evaluators
+
+A packed strength is an int with the category (highCard = 0 ... royalFlush = 9)
+above CATEGORY_SHIFT and the ranks, ordered by (count, rank), in 4 bit nibbles
+below it. Comparing two packed strengths compares the hands.
+'''
+
+DECKS = ["royalFlush", "straightFlush", "fourKind", "fullHouse",
+         "flush", "straight", "threeKind", "twoPair", "onePair", "highCard"]
+
+CATEGORY_SHIFT = 20
+CATEGORIES = {deck: len(DECKS) - 1 - i for i, deck in enumerate(DECKS)} # highCard = 0 ... royalFlush = 9
+
+WHEEL = 0b1000000001111 # A2345 as a rank mask
+BROADWAY = 0b1111100000000 # TJQKA
+
+
+def packStrength(ranks, flush=False):
+    '''
+    Packed strength of exactly five ranks (0 = deuce ... 12 = ace), the one
+    5 card classifier, new.handStrength and the lookup tables both use it
+    '''
+    occ = {}
+    for r in ranks: occ[r] = occ.get(r, 0) + 1
+
+    groups = sorted(((n, r) for r, n in occ.items()), reverse = True)
+
+    sc = 0
+    for n, r in groups: sc = (sc << 4) | (r + 2)
+
+    if len(groups) == 5:
+        mask = 0
+        for r in ranks: mask |= 1 << r
+
+        high = groups[0][1]
+        if mask == WHEEL: is_straight = True; high = 3
+        else: is_straight = mask >> (high - 4) == 0b11111
+
+        if is_straight and flush:
+            deck = "royalFlush" if mask == BROADWAY else "straightFlush"
+            sc = high + 2
+        elif flush: deck = "flush"
+        elif is_straight:
+            deck = "straight"
+            sc = high + 2
+        else: deck = "highCard"
+
+    elif groups[0][0] == 4: deck = "fourKind"
+    elif groups[0][0] == 3: deck = "fullHouse" if groups[1][0] == 2 else "threeKind"
+    elif groups[1][0] == 2: deck = "twoPair"
+    else: deck = "onePair"
+
+    return (CATEGORIES[deck] << CATEGORY_SHIFT) | sc
+
+
+def handName(strength): return DECKS[len(DECKS) - 1 - (strength >> CATEGORY_SHIFT)]
+
+
+def pack(deck, ranks):
+    '''Packed strength of a category and its ranks (0 = deuce ... 12 = ace), most significant first'''
+    sc = 0
+    for r in ranks: sc = (sc << 4) | (r + 2)
+    return (CATEGORIES[deck] << CATEGORY_SHIFT) | sc
+
+def highestStraight(mask):
+    '''Top rank of the best straight in a rank mask, None if there isn't one'''
+    for high in range(12, 3, -1):
+        if mask >> (high - 4) & 0b11111 == 0b11111: return high
+    if mask & WHEEL == WHEEL: return 3
+    return None
+
+def flushStrength(mask):
+    '''Best packed strength from the ranks of one suit, mask needs 5 or more bits set'''
+    high = highestStraight(mask)
+    if high is not None: return pack("royalFlush" if high == 12 else "straightFlush", [high])
+
+    return pack("flush", [r for r in range(12, -1, -1) if mask >> r & 1][:5])
+
+def bestStrength(ranks):
+    '''
+    Best packed strength of any 5 of 1 - 7 ranks (fewer than 5 just packs
+    what's there), ignoring flushes. The same as the best packStrength of
+    every 5 rank subset, which is what 5 ranks go straight to
+    '''
+    if len(ranks) == 5: return packStrength(ranks)
+
+    occ = {}; mask = 0
+    for r in ranks:
+        occ[r] = occ.get(r, 0) + 1
+        mask |= 1 << r
+
+    groups = sorted(((n, r) for r, n in occ.items()), reverse = True)
+    by_rank = sorted(occ, reverse = True)
+
+    def kickers(used, n): return [r for r in by_rank if r not in used][:n]
+
+    top_n, top = groups[0]
+
+    if top_n == 4: return pack("fourKind", [top] + kickers([top], 1))
+
+    if top_n == 3:
+        pairs = [r for n, r in groups[1:] if n >= 2]
+        if pairs: return pack("fullHouse", [top, max(pairs)])
+
+    high = highestStraight(mask)
+    if high is not None: return pack("straight", [high])
+
+    if top_n == 3: return pack("threeKind", [top] + kickers([top], 2))
+
+    pairs = [r for n, r in groups if n == 2]
+    if len(pairs) >= 2: return pack("twoPair", pairs[:2] + kickers(pairs[:2], 1))
+    if pairs: return pack("onePair", pairs + kickers(pairs, 3))
+
+    return pack("highCard", by_rank[:5])
@@ -0,0 +1,87 @@
+'''
+Incremental hand state for streaming Hold'em streets
+
+A HandState takes card indexes one at a time (hole cards, then the flop,
+turn and river) and keeps the rank histogram, per suit rank masks, the
+overall rank mask and the rank-prime product up to date, so the best
+strength so far is a table lookup after each card instead of a fresh
+evaluation.
+'''
+
+from .cards import PRIMES
+from .hands import bestStrength, handName
+from .seven import FLUSH7, RANKS7, load
+
+MAX_CARDS = 7
+STREETS = {0: "empty", 1: "partial", 2: "preflop", 3: "partial", 4: "partial", 5: "flop", 6: "turn", 7: "river"}
+
+
+class HandState():
+
+    def __init__(self, cards=()):
+
+        if not RANKS7: load()
+        self.__cards = []
+        self.__rank_counts = [0] * 13
+        self.__suit_masks = [0, 0, 0, 0]
+        self.__rank_mask = 0
+        self.__product = 1
+
+        self.__flush = 0
+        self.__strength = None
+
+        for card in cards: self.add(card)
+
+    def add(self, card):
+        if not 0 <= card < 52: raise Exception(f"Invalid card index {card}, expected 0 - 51")
+        if card in self.__cards: raise Exception(f"Card {card} is already in the hand")
+        if len(self.__cards) >= MAX_CARDS: raise Exception(f"The hand is full! Expected <= {MAX_CARDS} cards")
+
+        rank = card >> 2; suit = card & 3
+
+        self.__cards.append(card)
+        self.__rank_counts[rank] += 1
+        self.__suit_masks[suit] |= 1 << rank
+        self.__rank_mask |= 1 << rank
+        self.__product *= PRIMES[rank]
+
+        # only the suit of the new card can have turned into a flush
+        self.__flush = max(self.__flush, FLUSH7[self.__suit_masks[suit]])
+
+        if self.__flush: self.__strength = self.__flush
+        elif len(self.__cards) >= 5: self.__strength = RANKS7[self.__product]
+        else: self.__strength = bestStrength([r for r in range(13) for _ in range(self.__rank_counts[r])])
+
+        return self
+
+    def extend(self, cards):
+        for card in cards: self.add(card)
+        return self
+
+    def copy(self):
+        '''New state with the same cards, e.g. to branch one seat per possible runout'''
+        return HandState(self.__cards)
+
+    def __repr__(self): return f"HandState({self.__cards}, {self.hand})"
+
+
+    @property
+    def cards(self): return tuple(self.__cards)
+
+    @property
+    def street(self): return STREETS[len(self.__cards)]
+
+    @property
+    def rank_counts(self): return tuple(self.__rank_counts)
+
+    @property
+    def suit_counts(self): return tuple(bin(mask).count("1") for mask in self.__suit_masks)
+
+    @property
+    def rank_mask(self): return self.__rank_mask
+
+    @property
+    def strength(self): return self.__strength
+
+    @property
+    def hand(self): return None if self.__strength is None else handName(self.__strength)
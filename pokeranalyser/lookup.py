@@ -0,0 +1,107 @@
+'''
+Table driven 5 card evaluator (prime product / perfect hash style)
+
+Every 5 card hand falls into one of 7462 equivalence classes. The classes are
+numbered 1 (7-5-4-3-2 high card) to 7462 (royal flush), so a higher rank is a
+better hand, the same way round as new.handStrength.
+
+Three tables are built on first use and cached (see tables.py):
+
+FLUSHES:
+    indexed by the 13 bit rank mask of a flush, gives the class
+UNIQUE5:
+    indexed by the rank mask of five distinct ranks that aren't a flush
+    (straights and high cards), gives the class or 0 if any rank repeats
+PRODUCTS:
+    maps the product of the five rank primes to the class for every hand with
+    a repeated rank, the product is unique for each rank multiset
+'''
+
+from itertools import combinations, combinations_with_replacement
+
+from . import tables
+from .cards import PRIMES, CODES
+from .hands import packStrength, handName as strengthName
+
+HAND_CLASSES = 7462
+
+FLUSHES = [0] * 8192
+UNIQUE5 = [0] * 8192
+PRODUCTS = {}
+
+CLASS_CATEGORY = [None] * (HAND_CLASSES + 1) # class -> name in DECKS
+CLASS_STRENGTHS = [0] * (HAND_CLASSES + 1) # class -> packed strength, ascending
+
+ARRAYS = {}
+KEYS = ("flushes", "unique5", "product_keys", "product_values", "class_strengths")
+
+
+def buildTables():
+    '''Generates every equivalence class, orders them and returns the tables as arrays'''
+    import numpy as np
+
+    classes = [] # (packed strength, table, key)
+    flushes = np.zeros(8192, dtype = np.int16)
+    unique5 = np.zeros(8192, dtype = np.int16)
+    products = {}
+
+    for ranks in combinations(range(13), 5):
+        mask = 0
+        for r in ranks: mask |= 1 << r
+        classes.append((packStrength(ranks, True), "flushes", mask))
+        classes.append((packStrength(ranks), "unique5", mask))
+
+    for ranks in combinations_with_replacement(range(13), 5):
+        if len(set(ranks)) == 5: continue
+        if max(ranks.count(r) for r in ranks) > 4: continue
+
+        product = 1
+        for r in ranks: product *= PRIMES[r]
+        classes.append((packStrength(ranks), "products", product))
+
+    classes.sort()
+
+    strengths = np.zeros(HAND_CLASSES + 1, dtype = np.int32)
+    for i, (sc, table, key) in enumerate(classes):
+        if table == "flushes": flushes[key] = i + 1
+        elif table == "unique5": unique5[key] = i + 1
+        else: products[key] = i + 1
+        strengths[i + 1] = sc
+
+    keys = sorted(products)
+    return {"flushes": flushes, "unique5": unique5, "product_keys": np.array(keys, dtype = np.int64),
+            "product_values": np.array([products[k] for k in keys], dtype = np.int16), "class_strengths": strengths}
+
+def arrays():
+    if not ARRAYS: ARRAYS.update(tables.cached("lookup", buildTables, KEYS))
+    return ARRAYS
+
+def load():
+    '''Fills the tables in place from the cache'''
+    if PRODUCTS: return
+    a = arrays()
+
+    FLUSHES[:] = a["flushes"].tolist()
+    UNIQUE5[:] = a["unique5"].tolist()
+    CLASS_STRENGTHS[:] = a["class_strengths"].tolist()
+    CLASS_CATEGORY[1:] = [strengthName(sc) for sc in CLASS_STRENGTHS[1:]]
+    PRODUCTS.update(zip(a["product_keys"].tolist(), a["product_values"].tolist()))
+
+
+def evaluate(c1, c2, c3, c4, c5):
+    '''Returns the class (1 - 7462, higher is better) of five encoded cards'''
+    if not PRODUCTS: load()
+    q = (c1 | c2 | c3 | c4 | c5) >> 16
+
+    if c1 & c2 & c3 & c4 & c5 & 0xF000: return FLUSHES[q]
+
+    return UNIQUE5[q] or PRODUCTS[(c1 & 0xFF) * (c2 & 0xFF) * (c3 & 0xFF) * (c4 & 0xFF) * (c5 & 0xFF)]
+
+def evaluateHand(hand):
+    '''Same as evaluate but takes a hand of card indexes'''
+    c1, c2, c3, c4, c5 = [CODES[i] for i in hand]
+    return evaluate(c1, c2, c3, c4, c5)
+
+def handName(rank):
+    if not PRODUCTS: load()
+    return CLASS_CATEGORY[rank]
@@ -0,0 +1,199 @@
+'''
+Opt-in instrumentation for the evaluation hot paths
+
+Off unless POKER_METRICS=1 is set before the evaluators are imported (or
+enable() is called first, as the CLI does for --metrics). The stages are
+instrumented with @timed, which hands back the undecorated function when
+metrics are off, so a disabled build runs exactly the code it would without
+this module.
+
+Recorded while on:
+
+    stages      a timing histogram per stage (parse, validation,
+                classification, comparison, batch), the count of each
+                histogram is the number of calls
+    counters    named counts, e.g. games
+    categories  hits per hand category, from hit() or stages given a categorize function
+    caches      the stats of every LRUCache registered with watch()
+
+Timings are inclusive, comparison includes the classification of both
+hands. Each process keeps its own numbers, pool workers can send theirs
+back as a snapshot() for the parent to merge() (parallel.py does).
+
+snapshot() gives a JSON-able dict, toJson() the same as text and
+toPrometheus() the Prometheus text exposition format.
+'''
+
+import json
+import os
+from bisect import bisect_left
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+
+ENABLED = os.environ.get("POKER_METRICS") == "1"
+
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2, 0.1, 1.0) # upper bounds in seconds
+PREFIX = "pokeranalyser"
+
+
+class Histogram():
+
+    def __init__(self):
+
+        self.__counts = [0] * (len(BUCKETS) + 1) # the last bucket is +Inf
+        self.__sum = 0.0
+
+    def observe(self, seconds):
+        self.__counts[bisect_left(BUCKETS, seconds)] += 1
+        self.__sum += seconds
+
+    def merge(self, cumulative, seconds):
+        '''Adds another histogram's snapshot, its cumulative bucket counts and sum'''
+        previous = 0
+        for i, n in enumerate(cumulative):
+            self.__counts[i] += n - previous
+            previous = n
+        self.__sum += seconds
+
+    @property
+    def count(self): return sum(self.__counts)
+
+    @property
+    def sum(self): return self.__sum
+
+    @property
+    def buckets(self):
+        '''[(upper bound, cumulative count)], the last bound is inf'''
+        total = 0; out = []
+        for bound, n in zip(BUCKETS + (float("inf"),), self.__counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class Registry():
+
+    def __init__(self):
+
+        self.__lock = Lock()
+        self.__stages = {}
+        self.__counters = {}
+        self.__categories = {}
+        self.__caches = {}
+
+    def observe(self, stage, seconds):
+        with self.__lock:
+            if stage not in self.__stages: self.__stages[stage] = Histogram()
+            self.__stages[stage].observe(seconds)
+
+    def count(self, name, n=1):
+        with self.__lock: self.__counters[name] = self.__counters.get(name, 0) + n
+
+    def hit(self, category, n=1):
+        with self.__lock: self.__categories[category] = self.__categories.get(category, 0) + n
+
+    def watch(self, name, cache): self.__caches[name] = cache
+
+    def merge(self, snap):
+        '''Adds the stages, counters and categories of another process's snapshot'''
+        with self.__lock:
+            for stage, h in snap["stages"].items():
+                if stage not in self.__stages: self.__stages[stage] = Histogram()
+                self.__stages[stage].merge([n for bound, n in h["buckets"]], h["sum"])
+
+            for name, n in snap["counters"].items(): self.__counters[name] = self.__counters.get(name, 0) + n
+            for category, n in snap["categories"].items(): self.__categories[category] = self.__categories.get(category, 0) + n
+
+    def reset(self):
+        with self.__lock:
+            self.__stages.clear(); self.__counters.clear(); self.__categories.clear()
+
+    def snapshot(self):
+        with self.__lock:
+            return {"enabled": ENABLED,
+                    "stages": {stage: {"count": h.count, "sum": h.sum, "mean": h.sum / h.count if h.count else 0.0,
+                                       "buckets": [[b if b != float("inf") else "+Inf", n] for b, n in h.buckets]}
+                               for stage, h in self.__stages.items()},
+                    "counters": dict(self.__counters),
+                    "categories": dict(self.__categories),
+                    "caches": {name: cache.stats for name, cache in self.__caches.items()}}
+
+
+REGISTRY = Registry()
+
+
+def enable(on=True):
+    '''
+    Turns recording on, only stages decorated after this are timed. Also sets
+    POKER_METRICS so spawned worker processes record too
+    '''
+    global ENABLED
+    ENABLED = on
+    os.environ["POKER_METRICS"] = "1" if on else "0"
+
+def timed(stage, categorize=None):
+    '''
+    Records how long each call takes under stage, and if categorize is given
+    a hit for categorize(result). A no-op when metrics are off
+    '''
+    def decorator(fn):
+        if not ENABLED: return fn
+
+        observe = REGISTRY.observe; hit = REGISTRY.hit
+
+        @wraps(fn)
+        def wrapper(*a, **kwa):
+            start = perf_counter()
+            result = fn(*a, **kwa)
+            observe(stage, perf_counter() - start)
+            if categorize: hit(categorize(result))
+            return result
+        return wrapper
+    return decorator
+
+def count(name, n=1):
+    if ENABLED: REGISTRY.count(name, n)
+
+def watch(name, cache):
+    '''Includes cache.stats (see cache.LRUCache) in every snapshot'''
+    REGISTRY.watch(name, cache)
+
+def hit(category, n=1):
+    if ENABLED: REGISTRY.hit(category, n)
+
+def snapshot(): return REGISTRY.snapshot()
+
+def merge(snap): REGISTRY.merge(snap)
+
+def reset(): REGISTRY.reset()
+
+def toJson(): return json.dumps(snapshot())
+
+
+def labels(**kwa): return "{" + ",".join(f'{k}="{v}"' for k, v in kwa.items()) + "}"
+
+def toPrometheus():
+    '''The snapshot in the Prometheus text exposition format'''
+    snap = snapshot()
+    lines = []
+
+    lines += [f"# HELP {PREFIX}_stage_seconds Time spent per call in each evaluation stage",
+              f"# TYPE {PREFIX}_stage_seconds histogram"]
+    for stage, h in snap["stages"].items():
+        for bound, n in h["buckets"]: lines.append(f"{PREFIX}_stage_seconds_bucket{labels(stage = stage, le = bound)} {n}")
+        lines.append(f"{PREFIX}_stage_seconds_sum{labels(stage = stage)} {h['sum']}")
+        lines.append(f"{PREFIX}_stage_seconds_count{labels(stage = stage)} {h['count']}")
+
+    lines += [f"# HELP {PREFIX}_events_total Named event counters", f"# TYPE {PREFIX}_events_total counter"]
+    for name, n in snap["counters"].items(): lines.append(f"{PREFIX}_events_total{labels(name = name)} {n}")
+
+    lines += [f"# HELP {PREFIX}_category_hits_total Hands classified per category", f"# TYPE {PREFIX}_category_hits_total counter"]
+    for category, n in snap["categories"].items(): lines.append(f"{PREFIX}_category_hits_total{labels(category = category)} {n}")
+
+    for stat, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"), ("size", "gauge")):
+        metric = f"{PREFIX}_cache_{stat}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {metric} LRU cache {stat}", f"# TYPE {metric} {kind}"]
+        for name, stats in snap["caches"].items(): lines.append(f"{metric}{labels(cache = name)} {stats[stat]}")
+
+    return "\n".join(lines) + "\n"
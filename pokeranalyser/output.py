@@ -0,0 +1,267 @@
+'''
+Streaming result aggregation and writers
+
+Results arrive as chunks of (s1, s2), both players' packed strengths for a
+run of games (see parallel.streamStrengths). aggregate() tallies every
+chunk and hands it to any number of writers, each of which writes it out in
+slices of at most ROWS_PER_WRITE games, so memory depends on the chunk
+size and never on the number of games.
+
+Writers:
+
+    LinesWriter     one outcome per line ("player1", "player2" or "draw")
+    CsvWriter       game, player1, player1_hand, player2, player2_hand, outcome
+    JsonlWriter     the same fields as one JSON object per line
+    OutcomeWriter   .npy int8 array of outcomes (+1 player 1 wins, -1 player 2
+                    wins, 0 draw), np.load(path, mmap_mode = "r") reads it
+    ColumnarWriter  column store, see below
+
+Columnar file (little endian), a simplified Parquet layout:
+
+    4s      magic, b"PKRC", then 4 zero bytes
+    row groups, each column's values for the group stored contiguously
+            and zero padded to 8 bytes
+    footer  JSON: version, rows, columns [{name, dtype}],
+            row_groups [{rows, columns [{offset, size}]}]
+    I       footer length
+    4s      magic, b"PKRC"
+
+ColumnarFile maps a column of every row group without reading the others.
+'''
+
+import json
+import os
+import struct
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from .hands import CATEGORY_SHIFT, DECKS
+
+ROWS_PER_WRITE = 65536
+NPY_HEADER = 128 # bytes, magic and length included
+
+OUTCOMES = ("draw", "player1", "player2") # indexed by the outcome, -1 -> player2
+RESULTS = ("win", "tie", "loss")
+HAND_NAMES = np.array(DECKS[::-1]) # category number -> name
+
+
+def outcomes(s1, s2):
+    '''+1 where player 1 wins, -1 where player 2 wins, 0 for a draw'''
+    return np.sign(s1.astype(np.int64) - s2).astype(np.int8)
+
+def categories(strengths): return (np.asarray(strengths) >> CATEGORY_SHIFT).astype(np.int8)
+
+
+class Aggregator():
+    '''Running tallies of the outcomes and of every hand's category x result'''
+
+    def __init__(self):
+
+        self.__games = 0
+        self.__outcomes = np.zeros(3, dtype = np.int64) # player 2 wins, draws, player 1 wins
+        self.__categories = np.zeros((len(DECKS), len(RESULTS)), dtype = np.int64) # category number x win / tie / loss
+
+    def add(self, s1, s2):
+        result = outcomes(s1, s2)
+        self.__games += len(result)
+        self.__outcomes += np.bincount(result.astype(np.int64) + 1, minlength = 3)
+
+        # result index from each hand's own point of view: 0 win, 1 tie, 2 loss
+        for strengths, mine in ((s1, result), (s2, -result)):
+            cells = categories(strengths).astype(np.int64) * len(RESULTS) + (1 - mine)
+            self.__categories += np.bincount(cells, minlength = self.__categories.size).reshape(self.__categories.shape)
+
+    def tally(self):
+        '''JSON-able totals, categories counts every hand (two per game)'''
+        by_category = self.__categories[::-1] # royalFlush first, like DECKS
+        return {"games": self.__games, "player1_wins": int(self.__outcomes[2]), "player2_wins": int(self.__outcomes[0]),
+                "draws": int(self.__outcomes[1]),
+                "categories": {deck: int(by_category[i].sum()) for i, deck in enumerate(DECKS)},
+                "outcomes": {deck: dict(zip(RESULTS, by_category[i].tolist())) for i, deck in enumerate(DECKS)}}
+
+
+class Writer(ABC):
+    '''Base for the writers, write(s1, s2) a chunk at a time then close()'''
+
+    mode = "w"
+
+    def __init__(self, out):
+
+        self._owned = isinstance(out, str)
+        self._out = open(out, self.mode, buffering = 1 << 20) if self._owned else out
+        self._rows = 0
+
+    def write(self, s1, s2):
+        for i in range(0, len(s1), ROWS_PER_WRITE):
+            self.writeSlice(s1[i:i + ROWS_PER_WRITE], s2[i:i + ROWS_PER_WRITE])
+            self._rows += len(s1[i:i + ROWS_PER_WRITE])
+
+    @abstractmethod
+    def writeSlice(self, s1, s2): ...
+
+    def finish(self): pass
+
+    def close(self):
+        self.finish()
+        if self._owned: self._out.close()
+        else: self._out.flush()
+
+    def __enter__(self): return self
+
+    def __exit__(self, *exc): self.close()
+
+
+    @property
+    def rows(self): return self._rows
+
+
+class LinesWriter(Writer):
+
+    def writeSlice(self, s1, s2):
+        self._out.write("\n".join(np.array(OUTCOMES)[outcomes(s1, s2)].tolist()) + "\n")
+
+class CsvWriter(Writer):
+
+    def __init__(self, out):
+
+        super().__init__(out)
+        self._out.write("game,player1,player1_hand,player2,player2_hand,outcome\n")
+
+    def writeSlice(self, s1, s2):
+        rows = zip(range(self._rows, self._rows + len(s1)), s1.tolist(), HAND_NAMES[categories(s1)].tolist(),
+                   s2.tolist(), HAND_NAMES[categories(s2)].tolist(), outcomes(s1, s2).tolist())
+        self._out.write("".join(f"{n},{a},{ha},{b},{hb},{o}\n" for n, a, ha, b, hb, o in rows))
+
+class JsonlWriter(Writer):
+
+    def writeSlice(self, s1, s2):
+        rows = zip(range(self._rows, self._rows + len(s1)), s1.tolist(), HAND_NAMES[categories(s1)].tolist(),
+                   s2.tolist(), HAND_NAMES[categories(s2)].tolist(), outcomes(s1, s2).tolist())
+        self._out.write("".join(f'{{"game": {n}, "player1": {a}, "player1_hand": "{ha}", "player2": {b}, '
+                                f'"player2_hand": "{hb}", "outcome": {o}}}\n' for n, a, ha, b, hb, o in rows))
+
+
+class OutcomeWriter(Writer):
+    '''int8 outcomes as a .npy file, the header is rewritten with the final length on close'''
+
+    mode = "wb"
+
+    def __init__(self, out):
+
+        super().__init__(out)
+        self._out.write(self.header(0))
+
+    def header(self, rows):
+        # padded to a fixed NPY_HEADER bytes whatever the row count, so it can be rewritten in place
+        text = repr({"descr": "|i1", "fortran_order": False, "shape": (rows,)}).encode("latin1")
+        size = NPY_HEADER - 10
+        return np.lib.format.magic(1, 0) + struct.pack("<H", size) + text.ljust(size - 1) + b"\n"
+
+    def writeSlice(self, s1, s2): self._out.write(outcomes(s1, s2).tobytes())
+
+    def finish(self):
+        self._out.seek(0)
+        self._out.write(self.header(self._rows))
+        self._out.seek(0, os.SEEK_END)
+
+
+COLUMNAR_MAGIC = b"PKRC"
+COLUMNAR_VERSION = 1
+FOOTER = struct.Struct("<I4s")
+COLUMN_ALIGN = 8 # every column chunk is padded to a multiple of this
+
+COLUMNS = {"player1": np.int32, "player2": np.int32, "outcome": np.int8,
+           "player1_category": np.int8, "player2_category": np.int8}
+
+
+class ColumnarWriter(Writer):
+    '''Column store, each write slice is one row group'''
+
+    mode = "wb"
+
+    def __init__(self, out):
+
+        super().__init__(out)
+        self._out.write(COLUMNAR_MAGIC + bytes(COLUMN_ALIGN - len(COLUMNAR_MAGIC)))
+        self._offset = COLUMN_ALIGN
+        self._groups = []
+
+    def writeSlice(self, s1, s2):
+        values = {"player1": s1, "player2": s2, "outcome": outcomes(s1, s2),
+                  "player1_category": categories(s1), "player2_category": categories(s2)}
+
+        group = {"rows": len(s1), "columns": []}
+        for name, dtype in COLUMNS.items():
+            data = np.ascontiguousarray(values[name], dtype = np.dtype(dtype).newbyteorder("<")).tobytes()
+            data += bytes(-len(data) % COLUMN_ALIGN)
+            self._out.write(data)
+            group["columns"].append({"offset": self._offset, "size": len(data)})
+            self._offset += len(data)
+
+        self._groups.append(group)
+
+    def finish(self):
+        footer = json.dumps({"version": COLUMNAR_VERSION, "rows": self._rows,
+                             "columns": [{"name": name, "dtype": np.dtype(dtype).newbyteorder("<").str} for name, dtype in COLUMNS.items()],
+                             "row_groups": self._groups}).encode()
+        self._out.write(footer)
+        self._out.write(FOOTER.pack(len(footer), COLUMNAR_MAGIC))
+
+
+class ColumnarFile():
+
+    def __init__(self, path):
+
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            start = f.read(len(COLUMNAR_MAGIC))
+            f.seek(size - FOOTER.size)
+            length, end = FOOTER.unpack(f.read(FOOTER.size))
+            if start != COLUMNAR_MAGIC or end != COLUMNAR_MAGIC: raise Exception(f"Not a columnar results file: {path}")
+
+            f.seek(size - FOOTER.size - length)
+            meta = json.loads(f.read(length))
+
+        if meta["version"] != COLUMNAR_VERSION: raise Exception(f"Unsupported columnar version {meta['version']}, expected {COLUMNAR_VERSION}")
+
+        self.__path = path
+        self.__meta = meta
+        self.__names = [c["name"] for c in meta["columns"]]
+
+    def column(self, name, group=None):
+        '''One column of one row group, or of every row group joined'''
+        i = self.__names.index(name)
+        dtype = np.dtype(self.__meta["columns"][i]["dtype"])
+        groups = self.__meta["row_groups"] if group is None else [self.__meta["row_groups"][group]]
+
+        parts = [np.memmap(self.__path, dtype = dtype, mode = "r", offset = g["columns"][i]["offset"], shape = (g["rows"],))
+                 for g in groups if g["rows"]]
+        if not parts: return np.zeros(0, dtype = dtype)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def __len__(self): return self.__meta["rows"]
+
+    def __repr__(self): return f"ColumnarFile({self.__path!r}, {len(self)} rows)"
+
+
+    @property
+    def columns(self): return list(self.__names)
+
+    @property
+    def row_groups(self): return len(self.__meta["row_groups"])
+
+
+WRITERS = {"lines": LinesWriter, "csv": CsvWriter, "jsonl": JsonlWriter, "int8": OutcomeWriter, "columnar": ColumnarWriter}
+
+
+def aggregate(chunks, writers=()):
+    '''Tallies every (s1, s2) chunk and passes it on to each writer, returns the tally'''
+    aggregator = Aggregator()
+
+    for s1, s2 in chunks:
+        aggregator.add(s1, s2)
+        for writer in writers: writer.write(s1, s2)
+
+    for writer in writers: writer.close()
+    return aggregator.tally()
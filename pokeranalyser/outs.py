@@ -0,0 +1,121 @@
+'''
+Outs and draw probabilities
+
+An out is an unseen card that, coming next, improves the hand to a better
+category than it had and than the board and that card make on their own
+(a card that only pairs the board isn't an out), or when an opponent's
+hand is known and the hand is behind, puts it ahead. Unseen cards are
+walked straight off a 52 bit deck mask, and each candidate is scored by updating the rank-prime product and
+the one affected suit mask and looking the result up in the seven.py
+tables, so no hands are rebuilt per card. Turn + river runouts from the
+flop are scored together in one batch.
+'''
+
+import numpy as np
+
+from .batch import evaluate_best_batch
+from .cards import PRIMES
+from .exact import FULL_MASK, cardMask
+from .hands import CATEGORY_SHIFT, DECKS, bestStrength, flushStrength, handName
+from .seven import FLUSH7, RANKS7, load
+
+BOARD_SIZE = 5
+
+
+def baseState(cards):
+    '''(rank-prime product, per suit rank masks, best flush so far) of some cards'''
+    product = 1; masks = [0, 0, 0, 0]
+    for c in cards:
+        product *= PRIMES[c >> 2]
+        masks[c & 3] |= 1 << (c >> 2)
+    return product, masks, max(FLUSH7[mask] for mask in masks)
+
+def strengthWith(state, extra):
+    '''Best strength of the state's cards plus extra, 5 - 7 cards in total'''
+    product, masks, flush = state
+    changed = {}
+
+    for c in extra:
+        product *= PRIMES[c >> 2]
+        changed[c & 3] = changed.get(c & 3, masks[c & 3]) | 1 << (c >> 2)
+
+    for mask in changed.values(): flush = max(flush, FLUSH7[mask])
+    return flush or RANKS7[product]
+
+def boardCategory(cards):
+    '''Category 4 or 5 board cards make on their own'''
+    if len(cards) == 5 and len({c & 3 for c in cards}) == 1: return flushStrength(sum(1 << (c >> 2) for c in cards)) >> CATEGORY_SHIFT
+    return bestStrength([c >> 2 for c in cards]) >> CATEGORY_SHIFT
+
+def unseenCards(mask):
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def findOuts(hole, board, opponent=None, dead=()):
+    '''
+    Outs for hole on a flop or turn board
+
+    Returns the current hand, the outs (grouped by the category they make),
+    the chance the next card is an out and, on the flop, the chance of
+    getting there by the river over every turn + river runout.
+
+    With an opponent, ahead says whether hole is ahead now, outs are the
+    cards that take the lead (none when already ahead), and next_card and
+    by_river are the chances of being ahead after the next card and on the
+    river, whether or not hole is ahead now
+    '''
+    if not RANKS7: load()
+    if not 3 <= len(board) < BOARD_SIZE: raise Exception(f"Expected a flop or turn board, got {len(board)} cards")
+
+    known = tuple(hole) + tuple(board)
+    unseen = unseenCards(FULL_MASK & ~cardMask(known, opponent or (), dead))
+
+    hero = baseState(known)
+    villain = baseState(tuple(opponent) + tuple(board)) if opponent else None
+
+    now = strengthWith(hero, ())
+    category = now >> CATEGORY_SHIFT
+
+    if villain:
+        ahead = now > strengthWith(villain, ())
+        leads = [c for c in unseen if strengthWith(hero, (c,)) > strengthWith(villain, (c,))]
+        outs = [] if ahead else leads
+        next_card = len(leads) / len(unseen)
+    else:
+        def improved(c):
+            made = strengthWith(hero, (c,)) >> CATEGORY_SHIFT
+            return made > category and made > boardCategory(tuple(board) + (c,))
+
+        outs = [c for c in unseen if improved(c)]
+        next_card = len(outs) / len(unseen)
+
+    by_category = {deck: [] for deck in DECKS}
+    for c in outs: by_category[handName(strengthWith(hero, (c,)))].append(c)
+
+    result = {"hand": handName(now), "outs": outs, "by_category": {k: v for k, v in by_category.items() if v},
+              "unseen": len(unseen), "next_card": next_card}
+    if villain: result["ahead"] = ahead
+
+    if len(board) == 3: # every turn + river pair in one batch
+        first, second = np.triu_indices(len(unseen), 1)
+        cards = np.array(unseen, dtype = np.int8)
+        runouts = np.stack((cards[first], cards[second]), axis = 1)
+
+        def strengths(fixed): return evaluate_best_batch(np.concatenate((np.broadcast_to(np.array(fixed, dtype = np.int8), (len(runouts), len(fixed))), runouts), axis = 1))
+
+        s = strengths(known)
+
+        if villain: hits = s > strengths(tuple(opponent) + tuple(board))
+        else:
+            made = s >> CATEGORY_SHIFT
+            hits = (made > category) & (made > strengths(board) >> CATEGORY_SHIFT)
+
+        result["by_river"] = float(hits.mean())
+    else: result["by_river"] = next_card
+
+    return result
@@ -0,0 +1,121 @@
+'''
+Multi process evaluation of large hand files
+
+The file is split into byte ranges that start and end on line boundaries,
+each range is evaluated in a ProcessPoolExecutor worker through its own
+memory map, and streamStrengths hands back the per game strengths a range
+at a time in file order, so the result doesn't depend on which worker
+finishes first. evaluateFile tallies that stream with output.aggregate.
+'''
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+
+import numpy as np
+
+from . import lookup, metrics
+from .batch import evaluate_batch
+from .cards import CODES
+from .hands import CATEGORY_SHIFT, DECKS
+from .output import aggregate
+from .reader import openMap, lineEnd, readRange
+
+CHUNK_SIZE = 64 * 1024 * 1024 # bytes per worker task
+BATCH_SIZE = 65536 # games per parsed batch
+
+
+def splitRanges(path, chunk_size=CHUNK_SIZE):
+    '''(start, end) byte ranges of roughly chunk_size, each ending just after a newline'''
+    size = os.path.getsize(path)
+    m = openMap(path)
+    if m is None: return []
+
+    ranges = []
+    with m:
+        start = 0
+        while start < size:
+            end = lineEnd(m, min(start + chunk_size, size) - 1)
+            ranges.append((start, end))
+            start = end
+
+    return ranges
+
+
+@metrics.timed("batch")
+def batchStrengths(games, backend):
+    '''(s1, s2) packed strengths of both players for a batch of games'''
+    if backend == "batch": s1, s2 = evaluate_batch(games[:, :5]), evaluate_batch(games[:, 5:])
+
+    elif backend == "lookup":
+        evaluate = lookup.evaluate
+        classes = np.array([[evaluate(*[CODES[i] for i in game[:5]]), evaluate(*[CODES[i] for i in game[5:]])]
+                            for game in games.tolist()], dtype = np.int16).reshape(-1, 2)
+        strengths = np.asarray(lookup.arrays()["class_strengths"])[classes]
+        s1, s2 = strengths[:, 0], strengths[:, 1]
+
+    else: raise Exception(f"Unknown backend: {backend}")
+
+    if metrics.ENABLED:
+        metrics.count("games", len(games))
+        counts = np.bincount(np.concatenate((s1, s2)) >> CATEGORY_SHIFT, minlength = len(DECKS)).tolist()
+        for i, n in enumerate(counts):
+            if n: metrics.hit(DECKS[len(DECKS) - 1 - i], n)
+
+    return s1, s2
+
+def rangeStrengths(path, start, end, batch_size=BATCH_SIZE, backend="batch"):
+    '''(s1, s2) for every game in one byte range, run inside a worker'''
+    m = openMap(path)
+    if m is None: return np.zeros(0, dtype = np.int32), np.zeros(0, dtype = np.int32)
+
+    with m: results = [batchStrengths(games, backend) for games in readRange(m, start, end, batch_size)]
+    if not results: return np.zeros(0, dtype = np.int32), np.zeros(0, dtype = np.int32)
+
+    return np.concatenate([s1 for s1, s2 in results]), np.concatenate([s2 for s1, s2 in results])
+
+def workerStrengths(path, start, end, batch_size, backend):
+    '''rangeStrengths in a pool worker, plus the metrics snapshot for the range when they're on'''
+    if not metrics.ENABLED: return rangeStrengths(path, start, end, batch_size, backend), None
+
+    metrics.reset() # a forked worker starts with a copy of the parent's numbers
+    result = rangeStrengths(path, start, end, batch_size, backend)
+    return result, metrics.snapshot()
+
+def streamStrengths(path, workers=None, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, backend="batch"):
+    '''
+    Yields (s1, s2) arrays for each byte range of the file in order
+
+    At most 2 ranges per worker are in flight, so memory doesn't grow with
+    the file size
+    '''
+    ranges = splitRanges(path, chunk_size)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(ranges) <= 1:
+        for start, end in ranges: yield rangeStrengths(path, start, end, batch_size, backend)
+        return
+
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        def collect(future):
+            result, snap = future.result()
+            if snap: metrics.merge(snap)
+            return result
+
+        pending = deque()
+        for start, end in ranges:
+            pending.append(pool.submit(workerStrengths, path, start, end, batch_size, backend))
+            if len(pending) >= 2 * workers: yield collect(pending.popleft())
+
+        while pending: yield collect(pending.popleft())
+
+
+def evaluateFile(path, workers=None, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE, backend="batch"):
+    '''
+    Tallies player1_wins, player2_wins, draws, the category of every hand and
+    each category's win / tie / loss counts, see output.Aggregator
+
+    workers defaults to the number of CPUs, with workers = 1 everything runs
+    in this process
+    '''
+    return aggregate(streamStrengths(path, workers, chunk_size, batch_size, backend))
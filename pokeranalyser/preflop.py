@@ -0,0 +1,215 @@
+'''
+Heads-up preflop equity matrix
+
+matrix[i, j] is the equity of hand i against hand j, ties counted as half,
+over either the 169 starting hand classes or all 1326 two card combos.
+Each cell is a Monte Carlo estimate from `samples` deals drawn from
+SeedSequence(seed, spawn_key = (i, j)), so a cell's value doesn't depend
+on the worker count or on how often the job was resumed. Only j > i is
+simulated, matrix[j, i] is 1 - matrix[i, j]. The 169 class diagonal is
+exactly 0.5, a class against itself splits evenly by symmetry. For 1326
+combos, cells where the two combos share a card (the diagonal included)
+are NaN.
+
+The matrix is written to a memory mapped cache file:
+
+    header (32 bytes, little endian)
+        4s  magic, b"PKEQ"
+        H   format version
+        H   size (169 or 1326)
+        I   samples per cell
+        Q   seed
+        B   complete
+        11x reserved
+    size bytes     1 once row i has been computed (the checkpoint)
+    size x size    float32 matrix
+
+Rows are checkpointed as they finish, so an interrupted build carries on
+from where it stopped when run again with the same settings.
+'''
+
+import argparse
+import os
+import struct
+import sys
+import time
+from concurrent.futures import as_completed
+from itertools import combinations
+
+import numpy as np
+
+from .batch import evaluate_best_batch
+from .canonical import STARTING_HANDS, startingIndex
+from .config import CACHE_DIR
+from .shared import sharedPool
+
+MAGIC = b"PKEQ"
+VERSION = 2 # 2: the 169 class diagonal is 0.5
+HEADER = struct.Struct("<4sHHIQB11x")
+HEADER_SIZE = HEADER.size
+
+SIZES = (169, 1326)
+SAMPLES = 2000
+
+COMBOS = list(combinations(range(52), 2))
+COMBO_INDEX = {combo: i for i, combo in enumerate(COMBOS)}
+
+
+def comboIndex(hole): return COMBO_INDEX[tuple(sorted(hole))]
+
+def handIndex(hole, size): return startingIndex(hole) if size == 169 else comboIndex(hole)
+
+def handCombos(size):
+    '''For each matrix row, the two card combos it stands for'''
+    if size == 1326: return [[combo] for combo in COMBOS]
+
+    groups = [[] for _ in STARTING_HANDS]
+    for combo in COMBOS: groups[startingIndex(combo)].append(combo)
+    return groups
+
+def cachePath(size, samples, seed):
+    return os.path.join(CACHE_DIR, f"preflop-{size}-{samples}-{seed}-v{VERSION}.bin")
+
+
+def cellEquity(combos1, combos2, samples, seed, i, j):
+    '''Equity of a random combo of combos1 against a random non conflicting combo of combos2'''
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key = (i, j)))
+
+    a = np.array(combos1, dtype = np.int8)[rng.integers(len(combos1), size = samples)]
+    b = np.array(combos2, dtype = np.int8)[rng.integers(len(combos2), size = samples)]
+
+    clash = (a[:, :, None] == b[:, None, :]).any(axis = (1, 2))
+    if clash.all(): return np.nan
+
+    for _ in range(100): # redraw b where it shares a card with a
+        if not clash.any(): break
+        b[clash] = np.array(combos2, dtype = np.int8)[rng.integers(len(combos2), size = int(clash.sum()))]
+        clash = (a[:, :, None] == b[:, None, :]).any(axis = (1, 2))
+
+    a = a[~clash]; b = b[~clash]
+
+    keys = rng.random((len(a), 52))
+    rows = np.arange(len(a))[:, None]
+    keys[rows, a] = 2; keys[rows, b] = 2 # dealt cards sort last
+    board = keys.argsort(axis = 1)[:, :5].astype(np.int8)
+
+    s1 = evaluate_best_batch(np.concatenate((a, board), axis = 1))
+    s2 = evaluate_best_batch(np.concatenate((b, board), axis = 1))
+
+    return float(((s1 > s2).sum() + 0.5 * (s1 == s2).sum()) / len(a))
+
+def computeRow(size, samples, seed, i):
+    '''Equities of row i against every j >= i'''
+    groups = handCombos(size)
+    diagonal = 0.5 if size == 169 else np.nan
+    return i, np.array([diagonal] + [cellEquity(groups[i], groups[j], samples, seed, i, j) for j in range(i + 1, size)], dtype = np.float32)
+
+
+def openMatrixFile(path, size, samples, seed):
+    '''(done, matrix) writable memmaps, creating the file or checking it matches these settings'''
+    if os.path.exists(path):
+        with open(path, "rb") as f: magic, version, fsize, fsamples, fseed, complete = HEADER.unpack(f.read(HEADER_SIZE))
+        if (magic, version, fsize, fsamples, fseed) != (MAGIC, VERSION, size, samples, seed):
+            raise Exception(f"{path} was built with different settings, delete it to rebuild")
+    else:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, size, samples, seed, 0))
+            f.truncate(HEADER_SIZE + size + size * size * 4)
+
+    done = np.memmap(path, dtype = np.uint8, mode = "r+", offset = HEADER_SIZE, shape = (size,))
+    matrix = np.memmap(path, dtype = np.float32, mode = "r+", offset = HEADER_SIZE + size, shape = (size, size))
+    return done, matrix
+
+def build(size=169, samples=SAMPLES, seed=0, workers=None, path=None, progress=None):
+    '''Computes (or finishes) the matrix file and returns its path'''
+    if size not in SIZES: raise Exception(f"Expected a size of 169 or 1326, got {size}")
+
+    path = path or cachePath(size, samples, seed)
+    done, matrix = openMatrixFile(path, size, samples, seed)
+    todo = [i for i in range(size) if not done[i]]
+    workers = workers or os.cpu_count() or 1
+
+    stored = [size - len(todo)]
+
+    def store(i, row):
+        matrix[i, i:] = row
+        matrix[i + 1:, i] = 1 - row[1:]
+        matrix.flush()
+        done[i] = 1
+        done.flush()
+
+        stored[0] += 1
+        if progress: progress(stored[0], size)
+
+    if workers == 1:
+        for i in todo: store(*computeRow(size, samples, seed, i))
+    else:
+        with sharedPool(workers) as pool:
+            for future in as_completed([pool.submit(computeRow, size, samples, seed, i) for i in todo]):
+                store(*future.result())
+
+    with open(path, "r+b") as f: f.write(HEADER.pack(MAGIC, VERSION, size, samples, seed, 1))
+    return path
+
+
+class PreflopMatrix():
+
+    def __init__(self, path):
+
+        with open(path, "rb") as f: magic, version, size, samples, seed, complete = HEADER.unpack(f.read(HEADER_SIZE))
+
+        if magic != MAGIC: raise Exception(f"Not a preflop matrix: {path}")
+        if version != VERSION: raise Exception(f"Unsupported matrix version {version}, expected {VERSION}")
+        if not complete: raise Exception(f"{path} is only partly built, run build() again to finish it")
+
+        self.__size = size
+        self.__samples = samples
+        self.__seed = seed
+        self.__matrix = np.memmap(path, dtype = np.float32, mode = "r", offset = HEADER_SIZE + size, shape = (size, size))
+
+    def equity(self, hole1, hole2):
+        '''Equity of hole1 against hole2 (card index pairs), 0 - 1'''
+        return float(self.__matrix[handIndex(hole1, self.__size), handIndex(hole2, self.__size)])
+
+    def classEquity(self, name1, name2):
+        '''Equity between two of the 169 classes by name, e.g. ("AKs", "QQ")'''
+        if self.__size != 169: raise Exception("Class names need the 169 class matrix")
+        return float(self.__matrix[STARTING_HANDS.index(name1), STARTING_HANDS.index(name2)])
+
+
+    @property
+    def matrix(self): return self.__matrix
+
+    @property
+    def size(self): return self.__size
+
+    @property
+    def samples(self): return self.__samples
+
+    @property
+    def seed(self): return self.__seed
+
+
+def load(size=169, samples=SAMPLES, seed=0, path=None):
+    return PreflopMatrix(path or cachePath(size, samples, seed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog = "python -m pokeranalyser.preflop", description = "Build the heads-up preflop equity matrix")
+    parser.add_argument("--size", type = int, choices = SIZES, default = 169)
+    parser.add_argument("--samples", type = int, default = SAMPLES)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--workers", type = int)
+    parser.add_argument("--out", help = "matrix file, defaults to the cache directory")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    def progress(done, total): print(f"\r{done}/{total} rows  {time.perf_counter() - start:.0f}s", end = "", file = sys.stderr)
+
+    path = build(args.size, args.samples, args.seed, args.workers, args.out, progress)
+    print(file = sys.stderr)
+    print(path)
+    return 0
+
+if __name__ == "__main__": sys.exit(main())
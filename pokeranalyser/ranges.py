@@ -0,0 +1,167 @@
+'''
+Hand ranges and range vs range equity
+
+A range is a dict of two card combos (sorted card index tuples) to weights,
+parsed from the usual notation:
+
+    "TT+, AKs, KQo, A5s-A2s, 77-55, ATs+, AK, AsKs, QJs:0.5"
+
+pairs, pairs and up, pair spans, suited / offsuit / either, a kicker and
+up to one below the top card, kicker spans, exact combos, and an optional
+":weight" on any of them.
+
+Combo pairs are grouped by their suit isomorphic form together with the
+board, so each group is evaluated once and counted with its total weight.
+Exact group equities are kept in EQUITY_CACHE under the same key, so a
+matchup that comes up again, in this call or a later one, isn't enumerated
+again.
+'''
+
+import re
+
+import numpy as np
+
+from . import metrics
+from .batch import evaluate_best_batch
+from .cache import LRUCache
+from .cards import RANKS, parseCard
+from .exact import cardMask, exactEquity
+
+RANK = "[2-9TJQKA]"
+
+PAIR = re.compile(f"^({RANK})\\1(\\+)?$")
+PAIR_SPAN = re.compile(f"^({RANK})\\1-({RANK})\\2$")
+HAND = re.compile(f"^({RANK})({RANK})([SO])?(\\+)?$")
+HAND_SPAN = re.compile(f"^({RANK})({RANK})([SO])?-({RANK})({RANK})([SO])?$")
+COMBO = re.compile(f"^({RANK}[SCHD])({RANK}[SCHD])$")
+
+SAMPLES = 5000 # deals per combo pair group when there is no flop to enumerate
+
+EQUITY_CACHE = LRUCache(65536) # canonicalPair key -> exact equity of a against b, 0 - 1
+metrics.watch("equity_cache", EQUITY_CACHE)
+
+
+def classCombos(high, low, kind=None):
+    '''Combos of ranks high / low, kind is "S" (suited), "O" (offsuit) or None for both'''
+    if high == low: return [(high * 4 + a, high * 4 + b) for a in range(4) for b in range(a + 1, 4)]
+
+    combos = []
+    for a in range(4):
+        for b in range(4):
+            if kind == "S" and a != b: continue
+            if kind == "O" and a == b: continue
+            combos.append(tuple(sorted((high * 4 + a, low * 4 + b))))
+    return combos
+
+def tokenCombos(token):
+    r = RANKS.index
+
+    m = PAIR.match(token)
+    if m: return [c for rank in range(r(m[1]), 13 if m[2] else r(m[1]) + 1) for c in classCombos(rank, rank)]
+
+    m = PAIR_SPAN.match(token)
+    if m:
+        low, high = sorted((r(m[1]), r(m[2])))
+        return [c for rank in range(low, high + 1) for c in classCombos(rank, rank)]
+
+    m = HAND.match(token)
+    if m:
+        high, low = sorted((r(m[1]), r(m[2])), reverse = True)
+        top = high if m[4] else low + 1
+        return [c for kicker in range(low, top) for c in classCombos(high, kicker, m[3])]
+
+    m = HAND_SPAN.match(token)
+    if m and m[1] == m[4] and m[3] == m[6]:
+        high = r(m[1])
+        low, top = sorted((r(m[2]), r(m[5])))
+        return [c for kicker in range(low, top + 1) for c in classCombos(high, kicker, m[3])]
+
+    m = COMBO.match(token)
+    if m: return [tuple(sorted((parseCard(m[1]), parseCard(m[2]))))]
+
+    raise Exception(f"Invalid range token: {token}")
+
+def parseRange(text):
+    '''{combo: weight} for a range string'''
+    combos = {}
+
+    for token in text.replace(" ", "").split(","):
+        if not token: continue
+
+        weight = 1.0
+        if ":" in token: token, weight = token.split(":"); weight = float(weight)
+
+        for combo in tokenCombos(token.upper()): combos[combo] = weight
+
+    return combos
+
+
+def removeBlocked(combos, dead):
+    '''The range without combos that use a dead card'''
+    mask = cardMask(dead)
+    return {c: w for c, w in combos.items() if not (mask >> c[0] & 1 or mask >> c[1] & 1)}
+
+
+def canonicalPair(board, a, b, dead=()):
+    '''Suits renamed in order of first appearance over board, dead, a, b, the same key means the same equity'''
+    rename = {}
+    out = []
+
+    for group in (sorted(board), sorted(dead), sorted(a), sorted(b)):
+        for card in group:
+            if card & 3 not in rename: rename[card & 3] = len(rename)
+        out.append(tuple(sorted((card >> 2) * 4 + rename[card & 3] for card in group)))
+
+    return tuple(out)
+
+def sampledEquity(a, b, board, dead, samples, rng):
+    '''Monte Carlo equity of a against b (0 - 1) on random completions of board that avoid dead'''
+    used = list(a) + list(b) + list(board) + list(dead)
+    keys = rng.random((samples, 52))
+    keys[:, used] = 2 # dealt and dead cards sort last
+    runouts = keys.argsort(axis = 1)[:, :5 - len(board)].astype(np.int8)
+
+    boards = np.concatenate((np.broadcast_to(np.array(board, dtype = np.int8), (samples, len(board))), runouts), axis = 1)
+    s1 = evaluate_best_batch(np.concatenate((np.broadcast_to(np.array(a, dtype = np.int8), (samples, 2)), boards), axis = 1))
+    s2 = evaluate_best_batch(np.concatenate((np.broadcast_to(np.array(b, dtype = np.int8), (samples, 2)), boards), axis = 1))
+
+    return float(((s1 > s2).sum() + 0.5 * (s1 == s2).sum()) / samples)
+
+def rangeEquity(range1, range2, board=(), dead=(), samples=SAMPLES, seed=0):
+    '''
+    Equity (%) of range1 against range2
+
+    Ranges are strings or {combo: weight} dicts. Boards of 3 or more cards are
+    enumerated exactly, shorter ones are sampled `samples` times per group
+    '''
+    if isinstance(range1, str): range1 = parseRange(range1)
+    if isinstance(range2, str): range2 = parseRange(range2)
+
+    board = tuple(board); dead = tuple(dead)
+    range1 = removeBlocked(range1, tuple(board) + tuple(dead))
+    range2 = removeBlocked(range2, tuple(board) + tuple(dead))
+
+    groups = {} # canonical key -> [total weight, (a, b)]
+    for a, wa in range1.items():
+        for b, wb in range2.items():
+            if a[0] in b or a[1] in b: continue
+
+            key = canonicalPair(board, a, b, dead)
+            if key in groups: groups[key][0] += wa * wb
+            else: groups[key] = [wa * wb, (a, b)]
+
+    if not groups: raise Exception("No combos left after removing blocked and overlapping hands")
+
+    rng = np.random.default_rng(seed)
+    total = 0.0; weight = 0.0
+
+    for key in sorted(groups):
+        w, (a, b) = groups[key]
+
+        if len(board) >= 3: eq = EQUITY_CACHE.get(key, lambda: exactEquity([a, b], board, dead)["players"][0]["equity"] / 100)
+        else: eq = sampledEquity(a, b, board, dead, samples, rng)
+
+        total += w * eq; weight += w
+
+    return {"equity": 100 * total / weight, "combos": sum(1 for a in range1 for b in range2 if not (a[0] in b or a[1] in b)),
+            "groups": len(groups)}
@@ -0,0 +1,85 @@
+'''
+Streaming reader for hand files like p054_poker.txt
+
+The file is memory mapped and parsed a batch at a time straight from the
+bytes, so memory use depends on the batch size and not on the file size.
+Each batch is an (N, 10) uint8 array of card indexes, player 1's hand in
+columns 0 - 4 and player 2's in columns 5 - 9.
+'''
+
+import mmap
+import os
+
+import numpy as np
+
+from . import metrics
+from .cards import RANKS, SUITS
+
+GAME_CARDS = 10
+LINE_BYTES = 30 # "8C TS KC 9H 4S 7D 2S 5D 3S AC\n"
+
+RANK_LUT = np.full(256, 255, dtype = np.uint8)
+SUIT_LUT = np.full(256, 255, dtype = np.uint8)
+for i, r in enumerate(RANKS): RANK_LUT[ord(r)] = i
+for i, s in enumerate(SUITS): SUIT_LUT[ord(s)] = i
+
+
+@metrics.timed("parse")
+def parseChunk(chunk):
+    '''
+    Parses whole lines of "TS"-style tokens into an (N, 10) array of card
+    indexes, every non blank line has to hold exactly 10 distinct cards
+    '''
+    chars = np.frombuffer(chunk, dtype = np.uint8)
+    chars = chars[(chars > 32) | (chars == 10)] # drop spaces, tabs and carriage returns, keep the line ends
+
+    newline = chars == 10
+    line = np.cumsum(newline)[~newline] # line number of every card character
+    lengths = np.bincount(line)
+    bad = np.flatnonzero((lengths != 0) & (lengths != GAME_CARDS * 2))
+    if len(bad): raise Exception(f"Malformed hand file, expected 10 two character cards per line, line {bad[0] + 1} of the chunk has {lengths[bad[0]] / 2:g}")
+
+    pairs = chars[~newline].reshape(-1, 2)
+    ranks = RANK_LUT[pairs[:, 0]]
+    suits = SUIT_LUT[pairs[:, 1]]
+
+    if (ranks == 255).any() or (suits == 255).any():
+        bad = pairs[(ranks == 255) | (suits == 255)][0]
+        raise Exception(f"Invalid card: {bad.tobytes().decode(errors = 'replace')}")
+
+    games = (ranks * 4 + suits).reshape(-1, GAME_CARDS)
+
+    repeated = (np.diff(np.sort(games, axis = 1), axis = 1) == 0).any(axis = 1)
+    if repeated.any(): raise Exception(f"The same card is dealt twice in game {np.flatnonzero(repeated)[0] + 1} of the chunk")
+
+    return games
+
+
+def lineEnd(m, pos):
+    '''Position just past the line containing pos'''
+    end = m.find(b"\n", pos)
+    return len(m) if end == -1 else end + 1
+
+def readRange(m, start, end, batch_size=65536):
+    '''Yields batches from the bytes start:end of a mapped file, both on line boundaries'''
+    step = batch_size * LINE_BYTES
+    pos = start
+
+    while pos < end:
+        stop = min(lineEnd(m, min(pos + step, end) - 1), end)
+        games = parseChunk(m[pos:stop])
+        if len(games): yield games
+        pos = stop
+
+
+def openMap(path):
+    '''Read only memory map of the file, None if it is empty'''
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0: return None
+        return mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+
+def readBatches(path, batch_size=65536):
+    m = openMap(path)
+    if m is None: return
+
+    with m: yield from readRange(m, 0, len(m), batch_size)
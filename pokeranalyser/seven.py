@@ -0,0 +1,78 @@
+'''
+7 card evaluator for Texas Hold'em
+
+Returns the best 5 card packed strength (see hands.py) of 5, 6 or 7 cards
+directly, without looking at the 5 card subsets. Two tables are built on
+first use and cached (see tables.py):
+
+FLUSH7:
+    indexed by the rank mask of the cards in one suit, gives the best flush
+    or straight flush when 5 or more bits are set, 0 otherwise
+RANKS7:
+    maps the product of the rank primes (a hash of the rank histogram) to the
+    best hand that isn't a flush
+
+With 7 or fewer cards, a hand holding a flush can't also hold four of a
+kind or a full house, so a flush suit decides the hand on its own.
+'''
+
+from itertools import combinations_with_replacement
+
+from . import tables
+from .cards import PRIMES
+from .hands import bestStrength, flushStrength
+
+FLUSH7 = [0] * 8192
+RANKS7 = {}
+
+ARRAYS = {} # flush7, ranks7_keys (sorted products), ranks7_values
+KEYS = ("flush7", "ranks7_keys", "ranks7_values")
+
+
+def buildTables():
+    import numpy as np
+
+    flush7 = np.zeros(8192, dtype = np.int32)
+    for mask in range(8192):
+        if bin(mask).count("1") >= 5: flush7[mask] = flushStrength(mask)
+
+    ranks7 = {}
+    for n in (5, 6, 7):
+        for ranks in combinations_with_replacement(range(13), n):
+            if max(ranks.count(r) for r in set(ranks)) > 4: continue
+
+            product = 1
+            for r in ranks: product *= PRIMES[r]
+            ranks7[product] = bestStrength(ranks)
+
+    keys = sorted(ranks7)
+    return {"flush7": flush7, "ranks7_keys": np.array(keys, dtype = np.int64),
+            "ranks7_values": np.array([ranks7[k] for k in keys], dtype = np.int32)}
+
+def arrays():
+    '''The tables as (memory mapped) arrays, for batch.py'''
+    if not ARRAYS: ARRAYS.update(tables.cached("seven", buildTables, KEYS))
+    return ARRAYS
+
+def load():
+    '''Fills FLUSH7 and RANKS7 in place for the per hand evaluators'''
+    if RANKS7: return
+    a = arrays()
+    FLUSH7[:] = a["flush7"].tolist()
+    RANKS7.update(zip(a["ranks7_keys"].tolist(), a["ranks7_values"].tolist()))
+
+
+def evaluate7(hand):
+    '''Best packed strength of 5 - 7 card indexes'''
+    if not RANKS7: load()
+    product = 1
+    suits = [0, 0, 0, 0]
+
+    for i in hand:
+        product *= PRIMES[i >> 2]
+        suits[i & 3] |= 1 << (i >> 2)
+
+    for mask in suits:
+        if FLUSH7[mask]: return FLUSH7[mask]
+
+    return RANKS7[product]
@@ -0,0 +1,65 @@
+'''
+Lookup tables shared between pool workers
+
+Rather than every worker process building (or unpickling) its own copy of
+the batch.py tables, the parent copies them once into a single
+multiprocessing.shared_memory block. Each worker's initializer attaches to
+the block by name and hands read only NumPy views of it to batch.py, so a
+worker starts in a few milliseconds and the tables are in memory once no
+matter how many workers run.
+'''
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from . import batch
+
+ALIGN = 64 # bytes, each table starts on a cache line
+
+ATTACHED = [] # this worker's block, kept open for as long as the views are used
+
+
+def publish():
+    '''(block, layout) a new shared memory block holding the batch tables, layout is [(dtype, shape, offset)]'''
+    arrays = batch.tables()
+
+    layout = []; offset = 0
+    for a in arrays:
+        layout.append((a.dtype.str, a.shape, offset))
+        offset += -(-a.nbytes // ALIGN) * ALIGN
+
+    block = SharedMemory(create = True, size = offset)
+    for a, (dtype, shape, start) in zip(arrays, layout):
+        np.ndarray(shape, dtype, buffer = block.buf, offset = start)[...] = a
+
+    return block, layout
+
+def views(block, layout):
+    arrays = [np.ndarray(shape, dtype, buffer = block.buf, offset = offset) for dtype, shape, offset in layout]
+    for a in arrays: a.flags.writeable = False
+    return arrays
+
+def attach(name, layout):
+    '''Pool initializer, points batch.py at the published block'''
+    block = SharedMemory(name = name)
+    ATTACHED.append(block)
+    batch.useTables(*views(block, layout))
+
+
+@contextmanager
+def sharedPool(workers):
+    '''
+    ProcessPoolExecutor with the tables published for its workers
+
+    The block is unlinked once the pool has shut down
+    '''
+    block, layout = publish()
+    try:
+        with ProcessPoolExecutor(max_workers = workers, initializer = attach, initargs = (block.name, layout)) as pool:
+            yield pool
+    finally:
+        block.close()
+        block.unlink()
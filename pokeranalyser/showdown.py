@@ -0,0 +1,78 @@
+'''
+Multi-way showdowns
+
+Every seat is scored in one evaluate_best_batch call, then the seats are
+grouped by strength, best first. Ties share the pot, and if the seats put
+in different amounts (all-ins) the pot is split into side pots, each going
+to the best hand among the seats that paid into it.
+'''
+
+import numpy as np
+
+from .batch import evaluate_best_batch
+from .hands import handName
+
+MIN_SEATS = 2
+MAX_SEATS = 10
+
+
+def sidePots(contributions):
+    '''[(amount, eligible seats)] from what each seat put in, smallest all-in first'''
+    pots = []; previous = 0
+
+    for level in sorted(set(contributions)):
+        if level <= previous: continue
+        amount = sum(min(c, level) - min(c, previous) for c in contributions)
+        pots.append((amount, [seat for seat, c in enumerate(contributions) if c >= level]))
+        previous = level
+
+    return pots
+
+
+def resolve_showdown(hands, board=(), contributions=None):
+    '''
+    Resolves a showdown between 2 - 10 seats
+
+    hands are each seat's card indexes (hole cards, or whole 5 - 7 card
+    hands when board is empty), all the same length. Returns:
+
+    strengths  packed strength per seat
+    hands      category name per seat
+    order      tie groups of seats, best first
+    winners    seats that win (a share of) the main pot
+    shares     fraction of the whole pot won by each seat
+    payouts    chips won by each seat, only when contributions are given
+    '''
+    if not MIN_SEATS <= len(hands) <= MAX_SEATS: raise Exception(f"Expected {MIN_SEATS} - {MAX_SEATS} hands, got {len(hands)}")
+
+    sizes = sorted(set(len(hand) for hand in hands))
+    if len(sizes) != 1: raise Exception(f"Expected every seat to have the same number of cards, got {sizes}")
+    if not 5 <= sizes[0] + len(board) <= 7: raise Exception(f"Expected 5 - 7 cards per seat with the board, got {sizes[0] + len(board)}")
+
+    dealt = [card for hand in hands for card in hand] + list(board)
+    if len(set(dealt)) != len(dealt): raise Exception("The same card is dealt twice")
+
+    cards = np.array([tuple(hand) + tuple(board) for hand in hands], dtype = np.int8)
+
+    strengths = evaluate_best_batch(cards).tolist()
+
+    order = []
+    for strength in sorted(set(strengths), reverse = True):
+        order.append([seat for seat, s in enumerate(strengths) if s == strength])
+
+    paid = contributions or [1] * len(hands)
+    if len(paid) != len(hands): raise Exception(f"Expected {len(hands)} contributions, got {len(paid)}")
+    if min(paid) < 0 or sum(paid) <= 0: raise Exception(f"Contributions must be >= 0 with a positive total, got {paid}")
+
+    payouts = [0.0] * len(hands)
+    for amount, eligible in sidePots(paid):
+        best = max(strengths[seat] for seat in eligible)
+        winners = [seat for seat in eligible if strengths[seat] == best]
+        for seat in winners: payouts[seat] += amount / len(winners)
+
+    total = sum(paid)
+    result = {"strengths": strengths, "hands": [handName(s) for s in strengths], "order": order, "winners": order[0],
+              "shares": [p / total for p in payouts]}
+    if contributions is not None: result["payouts"] = payouts
+
+    return result
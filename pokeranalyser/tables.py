@@ -0,0 +1,82 @@
+'''
+Persisted lookup tables
+
+Nothing is built when the package is imported. The first time a set of
+tables is needed it's generated, written to the cache directory (see
+config.py) as one .npy file per array, and every later process memory maps
+those files instead of building them again.
+
+Each set lives in its own directory named after the set, VERSION and a hash
+of the modules that generate the tables, so changing the table code (or the
+format) makes a fresh set rather than reading a stale one:
+
+    CACHE_DIR/seven-v1-3f2a9c1e04b7/flush7.npy ...
+
+A set is written to a temporary directory first and renamed into place, so
+a reader never sees half of one, and if the cache directory can't be
+written the freshly built tables are simply used from memory.
+'''
+
+import hashlib
+import os
+
+from .config import CACHE_DIR
+
+VERSION = 1
+
+SOURCES = ("cards.py", "hands.py", "lookup.py", "seven.py", "tables.py") # anything that changes what's built
+
+HASHES = [] # computed once per process
+
+
+def sourceHash():
+    '''Short hash of VERSION and the table generating modules'''
+    if not HASHES:
+        h = hashlib.sha256(str(VERSION).encode())
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in SOURCES:
+            with open(os.path.join(here, name), "rb") as f: h.update(f.read())
+        HASHES.append(h.hexdigest()[:12])
+
+    return HASHES[0]
+
+def tablePath(name):
+    return os.path.join(CACHE_DIR, f"{name}-v{VERSION}-{sourceHash()}")
+
+
+def save(path, arrays):
+    '''Writes {name: array} to the directory path, returns False if it couldn't'''
+    import shutil, tempfile
+    import numpy as np
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        temp = tempfile.mkdtemp(prefix = ".tmp-", dir = os.path.dirname(path))
+    except OSError: return False
+
+    try:
+        for key, array in arrays.items(): np.save(os.path.join(temp, f"{key}.npy"), array)
+        os.rename(temp, path)
+        return True
+    except OSError: # another process got there first, or the disk is full / read only
+        shutil.rmtree(temp, ignore_errors = True)
+        return os.path.isdir(path)
+
+def cached(name, build, keys):
+    '''
+    {key: read only array} for the table set name
+
+    Memory maps the cached set if there is one, otherwise calls build() for
+    the arrays and caches them
+    '''
+    import numpy as np # only once tables are wanted, so importing the package stays cheap
+
+    path = tablePath(name)
+
+    if not all(os.path.exists(os.path.join(path, f"{key}.npy")) for key in keys):
+        arrays = build()
+        if not save(path, arrays):
+            for array in arrays.values(): array.flags.writeable = False
+            return arrays
+
+    return {key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode = "r") for key in keys}